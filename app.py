@@ -3,9 +3,21 @@ AI Prompt Enhancer - Streamlit Web Application
 A user-friendly interface for enhancing and improving text prompts.
 """
 
+import csv
+import io
+import os
+import threading
 import streamlit as st
 import time
-from prompt_enhancer import enhance_prompt
+import prompt_enhancer
+from enhancer_batch import BatchJob, ERROR_FIELD, RESULT_FIELDS, detect_format, parse_records, safe_mp_context
+
+# Enhancement results are shared by every session of this server process
+RESULT_CACHE_TTL = int(os.environ.get('PROMPT_ENHANCER_APP_CACHE_TTL', 3600))
+RESULT_CACHE_ENTRIES = int(os.environ.get('PROMPT_ENHANCER_APP_CACHE_ENTRIES', 1000))
+# Worker processes used for bulk uploads (1 = enhance on the job thread)
+BATCH_WORKERS = int(os.environ.get('PROMPT_ENHANCER_APP_BATCH_WORKERS', os.cpu_count() or 1))
+BATCH_POLL_SECONDS = 0.5
 
 # Page configuration
 st.set_page_config(
@@ -69,6 +81,59 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+
+
+@st.cache_resource(show_spinner=False)
+def get_enhancer():
+    """Start loading the NLP models once per server process and share the enhancer."""
+    prompt_enhancer.warmup(block=False)
+    return prompt_enhancer.enhancer
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache_counters():
+    """Process-wide hit/miss counters of the result cache."""
+    return {'hits': 0, 'misses': 0, 'lock': threading.Lock()}
+
+
+# Set by the cached functions' bodies, which only run on a cache miss
+_cache_call = threading.local()
+
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _cached_enhancement(prompt, style, context_boost, models_ready):
+    _cache_call.miss = True
+    return dict(get_enhancer().enhance_prompt(prompt, style, context_boost, timings=True))
+
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _cached_comparison(prompt, context_boost, models_ready):
+    _cache_call.miss = True
+    return {
+        style: dict(result)
+        for style, result in get_enhancer().enhance_all_styles(prompt, context_boost).items()
+    }
+
+
+def _through_cache(cached_func, *args):
+    """
+    Call a cached function, recording whether the result came from the cache.
+    
+    The readiness of the models is part of the key, so results computed with
+    the regex fallback while they load are not served once they are ready.
+    
+    Returns:
+        tuple: (result, hit)
+    """
+    _cache_call.miss = False
+    result = cached_func(*args, prompt_enhancer.is_ready())
+    hit = not _cache_call.miss
+    counters = get_cache_counters()
+    with counters['lock']:
+        counters['hits' if hit else 'misses'] += 1
+    return result, hit
+
+
 # Title and Description
 st.markdown('<div class="header-title">✨ AI Prompt Enhancer</div>', unsafe_allow_html=True)
 st.markdown(
@@ -103,6 +168,13 @@ context_boost = st.sidebar.checkbox(
     help="Adds examples, specifications, and target audience details"
 )
 
+# Live preview toggle
+live_preview = st.sidebar.checkbox(
+    "⚡ **Live Preview**",
+    value=False,
+    help="Re-enhance as you edit; only the sentences you changed are reprocessed"
+)
+
 # Info box in sidebar
 with st.sidebar:
     st.divider()
@@ -126,7 +198,7 @@ with st.sidebar:
 st.divider()
 
 # Create tabs for different sections
-tab1, tab2, tab3 = st.tabs(["🚀 Enhancer", "📚 Examples", "ℹ️ About"])
+tab1, tab_batch, tab2, tab3 = st.tabs(["🚀 Enhancer", "📦 Batch", "📚 Examples", "ℹ️ About"])
 
 with tab1:
     # Input section
@@ -173,6 +245,22 @@ with tab1:
             sent_count = len([s for s in user_prompt.split('.') if s.strip()])
             st.metric("📌 Sentences", sent_count)
     
+    # Live preview reuses the analysis of unchanged sentences between edits
+    if live_preview and user_prompt and user_prompt.strip():
+        preview = get_enhancer().enhance_incremental(
+            prompt=user_prompt,
+            style=selected_style,
+            context_boost=context_boost,
+            timings=True
+        )
+        st.markdown("**⚡ Live Preview:**")
+        st.success(preview['enhanced_prompt'])
+        st.caption(
+            f"Reprocessed {preview['sentences']['recomputed']} of "
+            f"{preview['sentences']['total']} sentences in "
+            f"{preview['timings']['total'] * 1000:.1f} ms"
+        )
+    
     st.divider()
     
     # Enhancement button
@@ -183,19 +271,46 @@ with tab1:
             with st.spinner("🔄 Enhancing your prompt..."):
                 try:
                     # Enhance the prompt
-                    result = enhance_prompt(
-                        prompt=user_prompt,
-                        style=selected_style,
-                        context_boost=context_boost
+                    result, cache_hit = _through_cache(
+                        _cached_enhancement, user_prompt, selected_style, context_boost
                     )
                     
                     # Store result in session state
                     st.session_state.enhancement_result = result
+                    st.session_state.enhancement_cache_hit = cache_hit
                     st.session_state.show_result = True
                     
                 except Exception as e:
                     st.error(f"❌ Error during enhancement: {str(e)}")
     
+    # Side-by-side comparison: analysis runs once, only styling runs per style
+    if st.button("⚖️ Compare All Styles", use_container_width=True):
+        if not user_prompt or not user_prompt.strip():
+            st.error("❌ Please enter a prompt to enhance")
+        else:
+            with st.spinner("🔄 Enhancing in every style..."):
+                try:
+                    st.session_state.style_comparison, _ = _through_cache(
+                        _cached_comparison, user_prompt, context_boost
+                    )
+                    st.session_state.show_comparison = True
+                except Exception as e:
+                    st.error(f"❌ Error during enhancement: {str(e)}")
+    
+    if st.session_state.get('show_comparison'):
+        comparison = st.session_state.style_comparison
+        
+        st.divider()
+        st.markdown("### ⚖️ Style Comparison")
+        
+        style_cols = st.columns(len(comparison))
+        for col, (style, styled) in zip(style_cols, comparison.items()):
+            with col:
+                st.markdown(f"**{style.capitalize()}**")
+                st.caption(style_description.get(style, ''))
+                st.success(styled['enhanced_prompt'])
+                st.metric("📊 Enhanced Length", f"{styled['enhanced_length']} words")
+    
     # Display results
     if 'show_result' in st.session_state and st.session_state.show_result:
         result = st.session_state.enhancement_result
@@ -232,6 +347,30 @@ with tab1:
         with metric_col4:
             st.metric("🎯 Style Applied", result['style'].capitalize())
         
+        # Result cache status
+        counters = get_cache_counters()
+        if st.session_state.get('enhancement_cache_hit'):
+            st.caption(
+                f"⚡ Result cache: **hit** (served without re-running the pipeline) · "
+                f"{counters['hits']} hits / {counters['misses']} misses on this server"
+            )
+        else:
+            st.caption(
+                f"🧮 Result cache: **miss** (computed now) · "
+                f"{counters['hits']} hits / {counters['misses']} misses on this server"
+            )
+        
+        # Per-stage timings
+        if result.get('timings'):
+            label = "⏱️ Stage Timings"
+            if st.session_state.get('enhancement_cache_hit'):
+                label += " (from the cached run)"
+            with st.expander(label):
+                timing_cols = st.columns(len(result['timings']))
+                for col, (stage, seconds) in zip(timing_cols, result['timings'].items()):
+                    with col:
+                        st.metric(stage.replace('_', ' ').capitalize(), f"{seconds * 1000:.2f} ms")
+        
         st.divider()
         
         # Keywords and Synonyms
@@ -270,6 +409,7 @@ with tab1:
         with col2:
             if st.button("🔄 New Enhancement", use_container_width=True):
                 st.session_state.show_result = False
+                st.session_state.show_comparison = False
                 st.rerun()
         
         with col3:
@@ -307,6 +447,90 @@ Synonyms:
                     use_container_width=True
                 )
 
+with tab_batch:
+    st.markdown("### 📦 Bulk Enhancement")
+    st.caption(
+        "Upload a CSV or JSONL file with one prompt per row. Rows may set their own "
+        "'style' and 'context_boost'; otherwise the sidebar settings apply."
+    )
+    
+    uploaded = st.file_uploader("Prompt file", type=['csv', 'jsonl'])
+    job = st.session_state.get('batch_job')
+    
+    if uploaded is not None and (job is None or not job.running):
+        fmt = detect_format(uploaded.name)
+        try:
+            text = uploaded.getvalue().decode('utf-8-sig')
+            records = list(parse_records(io.StringIO(text, newline=''), fmt))
+        except (ValueError, csv.Error) as e:
+            records = []
+            st.error(f"❌ Could not read {uploaded.name}: {str(e)}")
+        
+        if records:
+            columns = list(dict.fromkeys(
+                key for record in records for key in record if key != ERROR_FIELD
+            )) or ['prompt']
+            prompt_field = st.selectbox(
+                "Prompt column",
+                options=columns,
+                index=columns.index('prompt') if 'prompt' in columns else 0
+            )
+            st.write(f"{len(records)} prompts ready")
+            invalid = sum(1 for record in records if record.get(ERROR_FIELD))
+            if invalid:
+                st.warning(f"⚠️ {invalid} rows could not be read and will be returned with an 'error'")
+            
+            if st.button("🚀 Enhance All", type="primary", use_container_width=True):
+                get_enhancer()
+                st.session_state.batch_job = BatchJob(
+                    records,
+                    workers=min(BATCH_WORKERS, max(1, len(records) // 16)),
+                    field=prompt_field,
+                    style=selected_style,
+                    context_boost=context_boost,
+                    # Never fork the threaded Streamlit server itself
+                    mp_context=safe_mp_context()
+                ).start()
+                st.session_state.batch_format = fmt
+                st.session_state.batch_name = uploaded.name
+                st.rerun()
+    
+    job = st.session_state.get('batch_job')
+    if job is not None:
+        progress = job.progress()
+        st.progress(
+            progress['fraction'],
+            text=f"{progress['done']} / {progress['total']} prompts · "
+                 f"{progress['rate']:.1f} prompts/s · {progress['elapsed']:.1f}s"
+        )
+        
+        if progress['running']:
+            if st.button("⏹️ Cancel", use_container_width=True):
+                job.cancel()
+        elif progress['error'] is not None:
+            st.error(f"❌ Error during enhancement: {str(progress['error'])}")
+        else:
+            if progress['cancelled']:
+                st.warning(f"⏹️ Cancelled after {progress['done']} prompts")
+            else:
+                st.success(f"✅ Enhanced {progress['done']} prompts in {progress['elapsed']:.1f}s")
+            
+            st.dataframe(
+                [{field: str(record.get(field, '')) for field in RESULT_FIELDS}
+                 for record in job.results[:100]],
+                use_container_width=True
+            )
+            
+            fmt = st.session_state.batch_format
+            stem = os.path.splitext(st.session_state.batch_name)[0]
+            st.download_button(
+                label="📥 Download Results",
+                data=job.dump(fmt),
+                file_name=f"{stem}_enhanced.{fmt}",
+                mime="text/csv" if fmt == 'csv' else "application/jsonl",
+                use_container_width=True
+            )
+
 with tab2:
     st.markdown("### 📚 Examples & Use Cases")
     
@@ -430,3 +654,10 @@ st.markdown(
     "</div>",
     unsafe_allow_html=True
 )
+
+# Poll a running batch job only once every tab has rendered, so a rerun
+# never leaves the Examples and About tabs showing stale elements
+job = st.session_state.get('batch_job')
+if job is not None and job.running:
+    time.sleep(BATCH_POLL_SECONDS)
+    st.rerun()
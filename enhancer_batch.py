@@ -0,0 +1,490 @@
+"""
+Batch Enhancement CLI - Enhance JSONL/CSV prompt corpora across CPU cores
+
+Usage:
+    python -m prompt_enhancer batch in.jsonl out.jsonl --workers 4 --style creative
+    python enhancer_batch.py in.csv out.csv --field text
+
+Records are streamed from disk in chunks, fanned out over a process pool
+where every worker loads spaCy/WordNet once, and written back in input
+order. Only a bounded number of chunks is in flight at any time, so memory
+stays flat regardless of corpus size. With --prefork the models are loaded
+once and shared copy-on-write by forked workers instead.
+
+A record that cannot be enhanced (a JSONL line that is not valid JSON or
+not an object, or a prompt that is not a string) does not stop the batch:
+it is written back with an 'error' field naming its line, and the output
+file only replaces an existing one once the whole batch has succeeded.
+
+BatchJob runs the same pipeline on a background thread and exposes its
+progress, for callers such as the web app that must not block.
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from enhancer_prefork import create_pool, memory_report, start_workers
+
+STYLES = ['professional', 'creative', 'detailed', 'simplified']
+RESULT_FIELDS = [
+    'enhanced_prompt', 'keywords', 'synonyms', 'style',
+    'context_boost_applied', 'original_length', 'enhanced_length'
+]
+# Set on records that could not be enhanced; records that already carry a
+# value in it are passed through without enhancement
+ERROR_FIELD = 'error'
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+
+def detect_format(path, fmt=None):
+    """Return 'csv' or 'jsonl' for a path, honouring an explicit override."""
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(path, fmt, field=None):
+    """Yield input records as dicts, one per line/row."""
+    with open(path, newline='', encoding='utf-8') as handle:
+        yield from parse_records(handle, fmt, field)
+
+
+def parse_records(handle, fmt, field=None):
+    """
+    Yield input records as dicts from an open text stream.
+
+    JSONL lines that are not valid JSON or not an object or string, and
+    records whose ``field`` is not a string, are yielded with an 'error'
+    giving their line number instead of raising.
+    """
+    if fmt == 'csv':
+        # CSV values are always strings
+        yield from csv.DictReader(handle)
+        return
+
+    for number, line in enumerate(handle, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield {ERROR_FIELD: f'line {number}: invalid JSON ({exc})'}
+            continue
+        if isinstance(record, str):
+            record = {'prompt': record}
+        if not isinstance(record, dict):
+            yield {ERROR_FIELD: f'line {number}: expected an object or a string, '
+                                f'got {type(record).__name__}'}
+            continue
+        error = _record_error(record, field) if field else None
+        if error is not None:
+            record = dict(record)
+            record[ERROR_FIELD] = f'line {number}: {error}'
+        yield record
+
+
+def _record_error(record, field):
+    """Return why a record cannot be enhanced, or None."""
+    if not isinstance(record, dict):
+        return f'expected an object, got {type(record).__name__}'
+    if record.get(ERROR_FIELD):
+        return record[ERROR_FIELD]
+    prompt = record.get(field)
+    if prompt is not None and not isinstance(prompt, str):
+        return f'"{field}" must be a string, got {type(prompt).__name__}'
+    return None
+
+
+def _parse_bool(value):
+    """Interpret JSON booleans and CSV strings such as 'yes' or '1'."""
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def _chunked(iterable, size):
+    """Yield lists of up to ``size`` items from an iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker():
+    """Load the NLP backends once per worker process."""
+    import prompt_enhancer
+    prompt_enhancer.warmup()
+
+
+_enhancers = {}
+
+
+def _get_enhancer(profile):
+    """Return this process's enhancer for a speed profile."""
+    import prompt_enhancer
+
+    if not profile:
+        return prompt_enhancer.enhancer
+    if profile not in _enhancers:
+        _enhancers[profile] = prompt_enhancer.PromptEnhancer(profile=profile)
+    return _enhancers[profile]
+
+
+def enhance_chunk(records, field='prompt', style='professional', context_boost=False,
+                  batch_size=64, profile=None):
+    """
+    Enhance a chunk of records and merge the results into them.
+
+    Args:
+        records (list): Input records (dicts)
+        field (str): Record key holding the prompt text
+        style (str): Default style for records without a 'style' value
+        context_boost (bool): Default for records without a 'context_boost' value
+        batch_size (int): spaCy ``nlp.pipe`` batch size
+        profile (str): Speed profile; None uses the default enhancer
+
+    Returns:
+        list: Copies of the records updated with the enhance_prompt() result
+        keys, or with an 'error' for records that could not be enhanced
+    """
+    checked = [(record, _record_error(record, field)) for record in records]
+    items = []
+    for record, error in checked:
+        if error is not None:
+            continue
+        boost = record.get('context_boost')
+        items.append({
+            'prompt': record.get(field) or '',
+            'style': record.get('style') or style,
+            'context_boost': context_boost if boost in (None, '') else _parse_bool(boost),
+        })
+
+    results = _get_enhancer(profile).enhance_prompts(items, batch_size=batch_size)
+    output = []
+    for record, error in checked:
+        merged = dict(record) if isinstance(record, dict) else {}
+        if error is None:
+            merged.update(next(results))
+        else:
+            merged[ERROR_FIELD] = error
+        output.append(merged)
+    return output
+
+
+class RecordWriter:
+    """
+    Write enhanced records as JSONL or CSV.
+
+    CSV columns are the input fields of ``fieldnames`` (by default, of the
+    first record) followed by RESULT_FIELDS and 'error'. Fields that first
+    appear in a later record are left out, with a warning on stderr; pass
+    the fields of every record as ``fieldnames`` to keep them.
+    """
+
+    def __init__(self, handle, fmt, fieldnames=None):
+        self.handle = handle
+        self.fmt = fmt
+        self.fieldnames = fieldnames
+        self.dropped = set()
+        self._csv = None
+
+    def write(self, record):
+        if self.fmt != 'csv':
+            self.handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+            return
+
+        if self._csv is None:
+            columns = record if self.fieldnames is None else self.fieldnames
+            fieldnames = [key for key in columns if key not in RESULT_FIELDS and key != ERROR_FIELD]
+            self._csv = csv.DictWriter(self.handle, fieldnames=fieldnames + RESULT_FIELDS + [ERROR_FIELD],
+                                       extrasaction='ignore')
+            self._csv.writeheader()
+        dropped = set(record).difference(self._csv.fieldnames, self.dropped)
+        if dropped:
+            self.dropped.update(dropped)
+            print(f"prompt_enhancer: CSV header has no column for {', '.join(sorted(map(str, dropped)))}; "
+                  f"dropping it", file=sys.stderr)
+        row = dict(record)
+        for key in ('keywords', 'synonyms'):
+            if key in row:
+                row[key] = json.dumps(row[key], ensure_ascii=False)
+        self._csv.writerow(row)
+
+
+def run_batch(records, write, workers=None, chunk_size=64, max_pending=None, prefork=False,
+              report_memory=None, mp_context=None, **options):
+    """
+    Enhance a stream of records, calling ``write`` for each result in input order.
+
+    Args:
+        records (iterable): Input records (dicts)
+        write (callable): Called once per enhanced record
+        workers (int): Worker processes; 0 or 1 runs everything in this process
+        chunk_size (int): Records sent to a worker per task
+        max_pending (int): Maximum chunks in flight (defaults to 4 per worker)
+        prefork (bool): Load models here and fork workers that share them
+        report_memory (callable): Called with the pool's memory report once
+            every chunk has been submitted
+        mp_context: multiprocessing context for the (non-prefork) pool;
+            defaults to the platform's start method
+        **options: Passed through to enhance_chunk()
+
+    Returns:
+        int: Number of records written
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    count = 0
+
+    if workers <= 1:
+        _init_worker()
+        for chunk in _chunked(records, chunk_size):
+            for record in enhance_chunk(chunk, **options):
+                write(record)
+                count += 1
+        return count
+
+    max_pending = max_pending or workers * 4
+    pending = deque()
+    if prefork:
+        profile = options.get('profile')
+        if profile:
+            # Build the profile's enhancer and pipeline before forking so
+            # workers share them instead of each loading their own
+            _init_worker()
+            _get_enhancer(profile).stop_words
+        pool = create_pool(workers, initializer=_init_worker, profiles=[profile] if profile else ())
+        start_workers(pool, workers)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   mp_context=mp_context)
+    with pool:
+        for chunk in _chunked(records, chunk_size):
+            pending.append(pool.submit(enhance_chunk, chunk, **options))
+            # Drain from the head so output order matches input order and
+            # memory is bounded by max_pending chunks.
+            while len(pending) >= max_pending:
+                for record in pending.popleft().result():
+                    write(record)
+                    count += 1
+        if report_memory is not None:
+            report_memory(memory_report(pool))
+        while pending:
+            for record in pending.popleft().result():
+                write(record)
+                count += 1
+    return count
+
+
+def safe_mp_context():
+    """
+    Return a start method that is safe to use from a multithreaded process.
+
+    Forking copies locks held by other threads (cache, loader or logging
+    locks) in their locked state, so a forked child can deadlock. forkserver
+    forks from a clean single-threaded server instead; spawn is the fallback.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class BatchJob:
+    """
+    Enhance a list of records with run_batch() on a background thread.
+
+    Progress can be polled from any thread while the job runs; results are
+    kept in input order and can be serialized with dump() once it finishes.
+    """
+
+    def __init__(self, records, workers=None, chunk_size=16, mp_context=None, **options):
+        """
+        Args:
+            records (iterable): Input records (dicts); read into memory up front
+            workers (int): Worker processes; 0 or 1 runs on the job thread
+            chunk_size (int): Records per worker task, which is also how
+                often progress advances
+            mp_context: multiprocessing context for the worker pool (defaults
+                to safe_mp_context(), since jobs start from threaded callers)
+            **options: Passed through to run_batch() and enhance_chunk()
+        """
+        options['mp_context'] = mp_context or safe_mp_context()
+        self.records = list(records)
+        self.total = len(self.records)
+        self.results = []
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(workers, chunk_size, options),
+            name='enhancer-batch', daemon=True
+        )
+
+    def start(self):
+        """Start processing and return the job."""
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _pending_records(self):
+        for record in self.records:
+            if self._cancel.is_set():
+                return
+            yield record
+
+    def _run(self, workers, chunk_size, options):
+        try:
+            run_batch(self._pending_records(), self.results.append,
+                      workers=workers, chunk_size=chunk_size, **options)
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.finished = time.perf_counter()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def cancel(self):
+        """Stop submitting records; chunks already in flight still finish."""
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns True if it has."""
+        self._thread.join(timeout)
+        return not self.running
+
+    def progress(self):
+        """
+        Return a snapshot of the job's progress.
+
+        Returns:
+            dict: done/total counts, fraction complete, elapsed seconds,
+            throughput in prompts per second and the job's state
+        """
+        done = len(self.results)
+        if self.started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            'done': done,
+            'total': self.total,
+            'fraction': done / self.total if self.total else 1.0,
+            'elapsed': elapsed,
+            'rate': done / elapsed if elapsed else 0.0,
+            'running': self.running,
+            'cancelled': self._cancel.is_set(),
+            'error': self.error,
+        }
+
+    def dump(self, fmt='jsonl'):
+        """Serialize the finished results as one JSONL or CSV document."""
+        handle = io.StringIO(newline='')
+        # Every result is known here, so no field has to be dropped
+        fieldnames = list(dict.fromkeys(key for record in self.results for key in record))
+        writer = RecordWriter(handle, fmt, fieldnames)
+        for record in self.results:
+            writer.write(record)
+        return handle.getvalue()
+
+
+def build_parser():
+    """Build the argument parser for the batch command."""
+    parser = argparse.ArgumentParser(
+        prog='python -m prompt_enhancer batch',
+        description='Enhance every prompt in a JSONL or CSV file.'
+    )
+    parser.add_argument('input', help='Input .jsonl or .csv file')
+    parser.add_argument('output', help='Output .jsonl or .csv file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count, 1 = in-process)')
+    parser.add_argument('--style', choices=STYLES, default='professional',
+                        help='Default style for records without a "style" field')
+    parser.add_argument('--context-boost', action='store_true',
+                        help='Apply context boost to records without a "context_boost" field')
+    parser.add_argument('--field', default='prompt', help='Record field holding the prompt')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Records per worker task')
+    parser.add_argument('--batch-size', type=int, default=64, help='spaCy nlp.pipe batch size')
+    parser.add_argument('--profile', choices=['fast', 'balanced', 'accurate'],
+                        help='Speed profile (default: PROMPT_ENHANCER_PROFILE or accurate)')
+    parser.add_argument('--prefork', action='store_true',
+                        help='Load models once and fork workers that share them copy-on-write')
+    parser.add_argument('--input-format', choices=['jsonl', 'csv'], help='Override input format')
+    parser.add_argument('--output-format', choices=['jsonl', 'csv'], help='Override output format')
+    return parser
+
+
+def _log_memory(report):
+    """Print per-worker unique memory so copy-on-write savings are visible."""
+    mb = 1024 * 1024
+    for worker in report['workers']:
+        print(f"worker {worker['pid']}: rss {worker['rss'] / mb:.1f}M, "
+              f"unique {worker['uss'] / mb:.1f}M", file=sys.stderr)
+    print(f"workers unique total: {report['workers_uss'] / mb:.1f}M", file=sys.stderr)
+
+
+def main(argv=None):
+    """Entry point for the batch command."""
+    args = build_parser().parse_args(argv)
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = detect_format(args.output, args.output_format)
+
+    start = time.perf_counter()
+    errors = 0
+
+    def write(record):
+        nonlocal errors
+        if record.get(ERROR_FIELD):
+            errors += 1
+            print(f"prompt_enhancer: skipped record: {record[ERROR_FIELD]}", file=sys.stderr)
+        writer.write(record)
+
+    # Write beside the output and move it into place only once the whole
+    # batch succeeded, so a failed run never truncates an earlier result
+    partial = args.output + '.partial'
+    with open(args.input, newline='', encoding='utf-8') as source:
+        try:
+            with open(partial, 'w', newline='', encoding='utf-8') as handle:
+                writer = RecordWriter(handle, out_fmt)
+                count = run_batch(
+                    parse_records(source, in_fmt, args.field),
+                    write,
+                    workers=args.workers,
+                    chunk_size=args.chunk_size,
+                    field=args.field,
+                    style=args.style,
+                    context_boost=args.context_boost,
+                    batch_size=args.batch_size,
+                    profile=args.profile,
+                    prefork=args.prefork,
+                    report_memory=_log_memory if args.prefork else None,
+                )
+        except BaseException:
+            os.remove(partial)
+            raise
+    os.replace(partial, args.output)
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Enhanced {count - errors} prompts in {elapsed:.2f}s ({rate:.1f} prompts/s)", file=sys.stderr)
+    if errors:
+        print(f"{errors} records could not be enhanced (see their 'error' field)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
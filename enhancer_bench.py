@@ -0,0 +1,301 @@
+"""
+Enhancer Benchmarks - Throughput and latency for every enhancement stage
+
+Usage:
+    python enhancer_bench.py                              # run and print a summary
+    python enhancer_bench.py --output results.json        # save full results
+    python enhancer_bench.py --baseline benchmarks/baseline.json
+    python enhancer_bench.py --save-baseline benchmarks/baseline.json
+
+Every run covers three corpora (short prompts, paragraphs and ~100KB
+documents) under four backend configurations:
+
+    spacy        - spaCy keywords + NLTK sentences/WordNet synonyms ('accurate' profile)
+    statistical  - RAKE/YAKE-style keywords, NLTK when installed ('fast' profile)
+    nltk         - NLTK sentences/WordNet synonyms, regex keywords ('fast' profile)
+    regex        - pure-regex fallback for every stage
+
+The spacy and statistical configurations look synonyms up in the prebuilt
+index when data/wordnet_synonyms.idx exists (recorded as
+meta.synonym_index); nltk and regex never use it, so they always measure
+WordNet traversal and the pure fallback.
+
+Configurations whose libraries are not installed are reported as skipped.
+With --baseline, p50 latencies are compared to the stored run and the
+command exits with status 1 if any stage is slower than the threshold and
+by more than --min-delta-ms (0.05 ms by default), so stages that take a
+few microseconds do not fail the gate on timer noise.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+import prompt_enhancer
+
+STAGES = ['enhance_prompt', 'extract_keywords', 'get_synonyms',
+          'expand_vague_sentences', 'apply_style', '_refine_for_style']
+CONFIGS = ['spacy', 'statistical', 'nltk', 'regex']
+STYLES = ['professional', 'creative', 'detailed', 'simplified']
+
+_VERBS = ['Make', 'Build', 'Create', 'Design', 'Develop', 'Write', 'Add', 'Improve', 'Use', 'Plan']
+_OBJECTS = ['a website', 'an API', 'a mobile app', 'a dashboard', 'a database schema',
+            'a landing page', 'a test suite', 'a data pipeline', 'a chatbot', 'a tutorial']
+_DETAILS = ['for data science students', 'that looks modern', 'with user authentication',
+            'for a small business', 'that scales to millions of users', 'with dark mode',
+            'using Python and PostgreSQL', 'for tracking fitness goals', 'with clear documentation',
+            'that is very fast and highly reliable']
+_FILLER = ['The system should handle errors gracefully.', 'Include examples for every feature.',
+           'It must work on mobile devices and desktop browsers.', 'Keep the code readable.',
+           'Performance matters more than visual polish in the first release.',
+           'Add monitoring so the team can see failures quickly!', 'Why does the current version feel slow?']
+
+
+def _sentence(rng):
+    return f"{rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_DETAILS)}."
+
+
+def build_corpora(seed=1234):
+    """Return the fixed benchmark corpora, generated deterministically from ``seed``."""
+    rng = random.Random(seed)
+    short = [_sentence(rng) for _ in range(200)]
+    paragraphs = [
+        ' '.join(_sentence(rng) if rng.random() < 0.5 else rng.choice(_FILLER) for _ in range(8))
+        for _ in range(50)
+    ]
+    documents = []
+    for _ in range(3):
+        parts, size = [], 0
+        while size < 100 * 1024:
+            sentence = _sentence(rng) if rng.random() < 0.5 else rng.choice(_FILLER)
+            parts.append(sentence)
+            size += len(sentence) + 1
+        documents.append(' '.join(parts))
+    return {'short': short, 'paragraph': paragraphs, 'document_100kb': documents}
+
+
+def config_available(config):
+    """Return True if the libraries a configuration needs are loaded."""
+    prompt_enhancer.warmup()
+    if config == 'spacy':
+        return prompt_enhancer.NLTK_AVAILABLE and prompt_enhancer.get_pipeline('accurate') is not None
+    if config == 'nltk':
+        return prompt_enhancer.NLTK_AVAILABLE
+    return True
+
+
+@contextmanager
+def backend(config):
+    """Select a backend configuration, yielding an uncached enhancer for it."""
+    saved = prompt_enhancer.NLTK_AVAILABLE, prompt_enhancer.get_default_index
+    if config == 'regex':
+        prompt_enhancer.NLTK_AVAILABLE = False
+    if config in ('regex', 'nltk'):
+        # Measure the fallback and WordNet paths, not the prebuilt synonym index
+        prompt_enhancer.get_default_index = lambda: None
+    profile = 'accurate' if config == 'spacy' else 'fast'
+    keyword_backend = 'statistical' if config == 'statistical' else 'spacy'
+    try:
+        yield prompt_enhancer.PromptEnhancer(cache_size=0, profile=profile,
+                                             keyword_backend=keyword_backend)
+    finally:
+        prompt_enhancer.NLTK_AVAILABLE, prompt_enhancer.get_default_index = saved
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies):
+    """Turn a list of per-call seconds into throughput and latency percentiles."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        'calls': len(ordered),
+        'throughput_per_s': len(ordered) / total if total else 0.0,
+        'mean_s': statistics.fmean(ordered) if ordered else 0.0,
+        'p50_s': _percentile(ordered, 0.50),
+        'p99_s': _percentile(ordered, 0.99),
+    }
+
+
+def _time_calls(func, inputs, repeat):
+    latencies = []
+    clock = time.perf_counter
+    # One untimed pass so lazy initialisation does not skew the numbers
+    for args in inputs:
+        func(*args)
+    for _ in range(repeat):
+        for args in inputs:
+            start = clock()
+            func(*args)
+            latencies.append(clock() - start)
+    return latencies
+
+
+def bench_corpus(enhancer, texts, repeat=3):
+    """Benchmark the full pipeline and each stage on one corpus."""
+    styled_inputs = [(text, STYLES[i % len(STYLES)]) for i, text in enumerate(texts)]
+
+    # Prepare each stage's real inputs outside the timed region
+    keyword_lists = [enhancer.extract_keywords(text) for text in texts]
+    synonym_inputs = [(word,) for keywords in keyword_lists for word in keywords[:5]]
+    expanded = [enhancer.expand_vague_sentences(text) for text in texts]
+    style_inputs = [(text, style) for text, (_, style) in zip(expanded, styled_inputs)]
+    refine_inputs = [(enhancer.apply_style(text, style), style) for text, style in style_inputs]
+
+    stages = {
+        'enhance_prompt': (enhancer.enhance_prompt, styled_inputs),
+        'extract_keywords': (enhancer.extract_keywords, [(text,) for text in texts]),
+        'get_synonyms': (enhancer.get_synonyms, synonym_inputs),
+        'expand_vague_sentences': (enhancer.expand_vague_sentences, [(text,) for text in texts]),
+        'apply_style': (enhancer.apply_style, style_inputs),
+        '_refine_for_style': (enhancer._refine_for_style, refine_inputs),
+    }
+    return {name: summarize(_time_calls(func, inputs, repeat))
+            for name, (func, inputs) in stages.items()}
+
+
+def run(configs=CONFIGS, repeat=3, seed=1234):
+    """Run the whole benchmark matrix and return JSON-serializable results."""
+    corpora = build_corpora(seed)
+    results = {}
+    for config in configs:
+        if not config_available(config):
+            results[config] = {'skipped': 'required NLP libraries are not installed'}
+            continue
+        with backend(config) as enhancer:
+            results[config] = {
+                name: bench_corpus(enhancer, texts, repeat)
+                for name, texts in corpora.items()
+            }
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'seed': seed,
+            'repeat': repeat,
+            'synonym_index': prompt_enhancer.get_default_index() is not None,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.3, min_delta=5e-5):
+    """
+    Compare p50 latencies against a baseline run.
+
+    Returns:
+        list: (config, corpus, stage, baseline_p50, current_p50) for every
+        stage that got slower by more than ``threshold`` (0.3 = 30%) and by
+        more than ``min_delta`` seconds, which filters scheduler and timer
+        noise on microsecond-scale stages
+    """
+    regressions = []
+    for config, corpora in baseline.get('results', {}).items():
+        current_corpora = current['results'].get(config, {})
+        if 'skipped' in corpora or 'skipped' in current_corpora:
+            continue
+        for corpus, stages in corpora.items():
+            for stage, stats in stages.items():
+                now = current_corpora.get(corpus, {}).get(stage)
+                if not now or not stats['p50_s']:
+                    continue
+                slower = now['p50_s'] - stats['p50_s']
+                if slower > min_delta and now['p50_s'] > stats['p50_s'] * (1 + threshold):
+                    regressions.append((config, corpus, stage, stats['p50_s'], now['p50_s']))
+    return regressions
+
+
+def uncompared(current, baseline):
+    """
+    List the configurations of a run that compare() could not check.
+
+    Returns:
+        list: (config, reason) for every configuration that ran now but is
+        missing from the baseline or was skipped when it was recorded
+    """
+    stored = baseline.get('results', {})
+    missing = []
+    for config, corpora in current['results'].items():
+        if 'skipped' in corpora:
+            continue
+        if config not in stored:
+            missing.append((config, 'not in the baseline'))
+        elif 'skipped' in stored[config]:
+            missing.append((config, f"skipped in the baseline ({stored[config]['skipped']})"))
+    return missing
+
+
+def print_summary(report, stream=sys.stdout):
+    """Print a compact table of the results."""
+    for config, corpora in report['results'].items():
+        print(f"\n[{config}]", file=stream)
+        if 'skipped' in corpora:
+            print(f"  skipped: {corpora['skipped']}", file=stream)
+            continue
+        for corpus, stages in corpora.items():
+            print(f"  {corpus}", file=stream)
+            for stage in STAGES:
+                stats = stages[stage]
+                print(f"    {stage:24} {stats['throughput_per_s']:>12.1f}/s"
+                      f"  p50 {stats['p50_s'] * 1e3:9.3f} ms  p99 {stats['p99_s'] * 1e3:9.3f} ms",
+                      file=stream)
+
+
+def build_parser():
+    """Build the argument parser for the benchmark."""
+    parser = argparse.ArgumentParser(description='Benchmark the prompt enhancement pipeline.')
+    parser.add_argument('--configs', nargs='+', choices=CONFIGS, default=CONFIGS,
+                        help='Backend configurations to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the small corpora')
+    parser.add_argument('--seed', type=int, default=1234, help='Corpus generation seed')
+    parser.add_argument('--output', help='Write the full results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a stored results file')
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help='Allowed p50 slowdown before flagging a regression (default: 0.3)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help='Ignore slowdowns smaller than this many milliseconds (default: 0.05)')
+    parser.add_argument('--save-baseline', help='Store this run as the new baseline')
+    return parser
+
+
+def main(argv=None):
+    """Entry point for the benchmark."""
+    args = build_parser().parse_args(argv)
+    report = run(args.configs, args.repeat, args.seed)
+    print_summary(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2)
+                handle.write('\n')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        for config, reason in uncompared(report, baseline):
+            print(f"\nWarning: {config} was not compared: {reason}", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms / 1e3)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for config, corpus, stage, before, after in regressions:
+                print(f"  {config}/{corpus}/{stage}: p50 {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms")
+            return 1
+        print(f"\nNo regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Enhancer Caches - Bounded, thread-safe LRU caches with hit/miss statistics
+
+LRUCache lives in process memory. PersistentCache stores the same kinds of
+entries in a local SQLite database (WAL mode) so warm state survives
+restarts and is shared by every process on the host.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def estimate_size(value):
+    """Roughly estimate the memory footprint of a cached value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and total byte size.
+
+    Either limit may be 0/None to disable it; a cache with ``max_entries=0``
+    stores nothing. All operations are safe to call from multiple threads.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, sizeof=estimate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @property
+    def enabled(self):
+        return bool(self.max_entries)
+
+    def get(self, key, default=None):
+        """Return the cached value for key, marking it most recently used."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries as needed."""
+        if not self.enabled:
+            return
+        size = self._sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class PersistentCache:
+    """
+    SQLite-backed cache shared between processes and surviving restarts.
+
+    Entries are keyed by a content hash of (kind, pipeline version, key) so
+    results from an older pipeline are never served. Expired entries count
+    as misses; size limits are enforced every ``evict_every`` writes by
+    dropping the least recently used rows. SQLite's WAL mode and busy
+    timeout make concurrent readers and writers across processes safe.
+    """
+
+    # Only refresh an entry's access time once per interval to keep reads cheap
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=100000, max_bytes=256 * 1024 * 1024,
+                 evict_every=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL,'
+                ' created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        # Connections must not cross a fork, so reopen in child processes
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def make_key(kind, version, key):
+        """Hash a cache key together with its kind and pipeline version."""
+        raw = json.dumps([kind, version, key], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, kind, version, key, default=None):
+        """Return the stored value, or ``default`` if missing or expired."""
+        digest = self.make_key(kind, version, key)
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT value, created, accessed FROM entries WHERE key = ?', (digest,)
+            ).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                with conn:
+                    conn.execute('DELETE FROM entries WHERE key = ?', (digest,))
+                row = None
+            if row is not None and now - row[2] > self.TOUCH_INTERVAL:
+                with conn:
+                    conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, digest))
+        except sqlite3.Error:
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return default if row is None else json.loads(row[0])
+
+    def set(self, kind, version, key, value):
+        """Store a JSON-serializable value."""
+        digest = self.make_key(kind, version, key)
+        encoded = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO entries (key, kind, value, created, accessed, size)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (digest, kind, encoded, now, now, len(encoded))
+                )
+        except sqlite3.Error:
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired rows, then least recently used rows over the size limits."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                removed = 0
+                if self.ttl:
+                    removed += conn.execute(
+                        'DELETE FROM entries WHERE created < ?', (now - self.ttl,)
+                    ).rowcount
+                count, total = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+                ).fetchone()
+                if self.max_entries and count > self.max_entries:
+                    removed += conn.execute(
+                        'DELETE FROM entries WHERE key IN '
+                        '(SELECT key FROM entries ORDER BY accessed LIMIT ?)',
+                        (count - self.max_entries,)
+                    ).rowcount
+                    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+                while self.max_bytes and total > self.max_bytes:
+                    # Remove the oldest tenth of the rows until under budget
+                    batch = max(1, conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] // 10)
+                    removed += conn.execute(
+                        'DELETE FROM entries WHERE key IN '
+                        '(SELECT key FROM entries ORDER BY accessed LIMIT ?)', (batch,)
+                    ).rowcount
+                    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        except sqlite3.Error:
+            return
+        with self._lock:
+            self.evictions += removed
+
+    def clear(self):
+        """Delete every entry and reset the statistics."""
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM entries')
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return this process's hit/miss counters and the database occupancy."""
+        try:
+            count, total = self._connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+        except sqlite3.Error:
+            count = total = None
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': count,
+                'bytes': total,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'path': self.path,
+            }
@@ -0,0 +1,499 @@
+"""
+Load Generator - Replay prompt traffic and measure end-to-end latency
+
+Usage:
+    python enhancer_loadgen.py --rate 50 --duration 30              # in-process, 50 req/s
+    python enhancer_loadgen.py --concurrency 1,2,4,8,16 --duration 20
+    python enhancer_loadgen.py --url http://127.0.0.1:8080 --rate 200
+    python enhancer_loadgen.py --corpus traffic.jsonl --replay --speed 2 --output report.json
+
+Requests go either straight to ``enhance_prompt`` in this process or to a
+local enhancer_server.py over HTTP. Two load models are supported:
+
+    --rate R         open loop: requests arrive at R per second (Poisson
+                     inter-arrival times, or the corpus's recorded gaps with
+                     --replay) whether or not earlier requests finished
+    --concurrency C  closed loop: C users each send their next request as
+                     soon as the previous one returns; a comma-separated
+                     list runs one step per value to find where p99 degrades
+
+Open-loop latency is measured from each request's scheduled arrival, so
+time spent queueing behind a saturated target counts against it.
+
+The corpus is JSONL with a ``prompt`` and optional ``style``,
+``context_boost`` and ``t`` (seconds since the recording started) per line.
+Without one, a synthetic corpus is built from the benchmark generators.
+CPU and RSS of the process under load (this one, or the server and its
+workers as listed by GET /workers) are sampled from /proc every interval.
+Everything runs locally; nothing is downloaded.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from enhancer_prefork import process_memory
+
+STYLES = ['professional', 'creative', 'detailed', 'simplified']
+PERCENTILES = (0.50, 0.90, 0.95, 0.99)
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def load_corpus(path):
+    """Read (offset, prompt, style, context_boost) requests from a JSONL recording."""
+    requests = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {'prompt': record}
+            requests.append((
+                record.get('t'),
+                record['prompt'],
+                record.get('style') or 'professional',
+                bool(record.get('context_boost', False)),
+            ))
+    return requests
+
+
+def synthetic_corpus(size=500, seed=1234):
+    """Build a mixed corpus of short prompts and paragraphs with random styles."""
+    from enhancer_bench import build_corpora
+
+    rng = random.Random(seed)
+    corpora = build_corpora(seed)
+    texts = corpora['short'] + corpora['paragraph']
+    return [(None, rng.choice(texts), rng.choice(STYLES), rng.random() < 0.3)
+            for _ in range(size)]
+
+
+def arrival_times(requests, rate=None, speed=1.0, seed=1234):
+    """
+    Return each request's offset in seconds from the start of the run.
+
+    Recorded ``t`` offsets are replayed (divided by ``speed``) when every
+    request has one and no rate is given; otherwise arrivals are Poisson at
+    ``rate`` per second.
+    """
+    offsets = [request[0] for request in requests]
+    if rate is None and offsets and all(offset is not None for offset in offsets):
+        first = offsets[0]
+        return [(offset - first) / speed for offset in offsets]
+    if not rate:
+        raise ValueError('A rate is needed for a corpus without recorded arrival times')
+    rng = random.Random(seed)
+    now, times = 0.0, []
+    for _ in requests:
+        times.append(now)
+        now += rng.expovariate(rate)
+    return times
+
+
+class InProcessTarget:
+    """
+    Send requests to a PromptEnhancer in this process.
+
+    By default the enhancer has no result caches, so every request runs the
+    full pipeline; with ``cache=True`` the global, cached enhancer is used
+    and the report includes its result cache hit rate.
+    """
+
+    def __init__(self, cache=False):
+        import prompt_enhancer
+
+        prompt_enhancer.warmup()
+        self.enhancer = prompt_enhancer.enhancer if cache else prompt_enhancer.PromptEnhancer(cache_size=0)
+
+    def __call__(self, prompt, style, context_boost):
+        self.enhancer.enhance_prompt(prompt, style, context_boost)
+
+    def pids(self):
+        return [os.getpid()]
+
+    def cache_counts(self):
+        """Return the result cache's (hits, misses) so far."""
+        cache = self.enhancer.result_cache
+        return cache.hits, cache.misses
+
+
+class HTTPTarget:
+    """Send requests to enhancer_server.py over keep-alive HTTP connections."""
+
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.path = parts.path.rstrip('/') + '/enhance'
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(self, method, path, body=None):
+        """Send one request on this thread's connection; returns (status, body)."""
+        conn = self._connection()
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def __call__(self, prompt, style, context_boost):
+        body = json.dumps({'prompt': prompt, 'style': style, 'context_boost': context_boost})
+        status, payload = self.request('POST', self.path, body.encode('utf-8'))
+        if status != 200:
+            raise RuntimeError(f'HTTP {status}: {payload[:200].decode("utf-8", "replace")}')
+
+    def pids(self):
+        """Return the server's and its workers' pids, as reported by GET /workers."""
+        try:
+            status, payload = self.request('GET', '/workers')
+            report = json.loads(payload) if status == 200 else {}
+        except (OSError, http.client.HTTPException, ValueError):
+            return []
+        pids = [report.get('parent', {}).get('pid')]
+        pids.extend(worker['pid'] for worker in report.get('workers', []))
+        return [pid for pid in pids if pid]
+
+
+def cpu_seconds(pid):
+    """Return a process's user + system CPU time in seconds, or None if unreadable."""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='ascii') as handle:
+            # The command name may contain spaces; fields resume after its ')'
+            fields = handle.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class ResourceMonitor:
+    """Sample CPU and RSS of a set of processes, plus request stats, every interval."""
+
+    def __init__(self, pids, recorder, interval=1.0):
+        self.pids = pids
+        self.recorder = recorder
+        self.interval = interval
+        self.timeline = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='loadgen-monitor', daemon=True)
+
+    def _sample(self):
+        cpu = 0.0
+        rss = 0
+        for pid in self.pids:
+            seconds = cpu_seconds(pid)
+            memory = process_memory(pid)
+            cpu += seconds or 0.0
+            rss += memory['rss'] if memory else 0
+        return cpu, rss
+
+    def _run(self):
+        start = last = time.perf_counter()
+        last_cpu, _ = self._sample()
+        stopped = False
+        while not stopped:
+            # The last, possibly partial, interval is sampled on stop()
+            stopped = self._stop.wait(self.interval)
+            now = time.perf_counter()
+            if now - last < self.interval / 10:
+                break
+            cpu, rss = self._sample()
+            latencies, errors = self.recorder.drain_window()
+            self.timeline.append({
+                't': round(now - start, 3),
+                'cpu_percent': 100.0 * (cpu - last_cpu) / (now - last),
+                'rss_bytes': rss,
+                'completed': len(latencies),
+                'errors': errors,
+                'throughput_per_s': len(latencies) / (now - last),
+                'p99_s': percentile(sorted(latencies), 0.99),
+            })
+            last, last_cpu = now, cpu
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.timeline
+
+
+class Recorder:
+    """Thread-safe collector of request latencies and errors."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = {}
+        self._window = []
+        self._window_errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies.append(seconds)
+                self._window.append(seconds)
+            else:
+                self.errors[error] = self.errors.get(error, 0) + 1
+                self._window_errors += 1
+
+    def drain_window(self):
+        """Return and reset the latencies and error count since the last call."""
+        with self._lock:
+            window, errors = self._window, self._window_errors
+            self._window, self._window_errors = [], 0
+        return window, errors
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _send(target, recorder, request, scheduled):
+    _, prompt, style, context_boost = request
+    try:
+        target(prompt, style, context_boost)
+    except Exception as exc:
+        recorder.record(0.0, type(exc).__name__)
+        return
+    recorder.record(time.perf_counter() - scheduled)
+
+
+def run_open_loop(target, requests, times, recorder, duration=None, max_inflight=256):
+    """
+    Issue requests at their arrival offsets without waiting for responses.
+
+    Returns:
+        int: Number of requests issued
+    """
+    issued = 0
+    with ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix='loadgen') as pool:
+        start = time.perf_counter()
+        for request, offset in zip(requests, times):
+            if duration is not None and offset >= duration:
+                break
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_send, target, recorder, request, start + offset)
+            issued += 1
+    return issued
+
+
+def run_closed_loop(target, requests, concurrency, recorder, duration=None, total=None):
+    """
+    Run ``concurrency`` users that each send requests back to back.
+
+    Stops after ``duration`` seconds, or once ``total`` requests (default:
+    one pass over the corpus) have been sent when no duration is given.
+
+    Returns:
+        int: Number of requests issued
+    """
+    lock = threading.Lock()
+    counter = [0]
+    limit = total if total is not None else (None if duration else len(requests))
+    deadline = None if duration is None else time.perf_counter() + duration
+
+    def user():
+        while deadline is None or time.perf_counter() < deadline:
+            with lock:
+                index = counter[0]
+                if limit is not None and index >= limit:
+                    return
+                counter[0] += 1
+            _send(target, recorder, requests[index % len(requests)], time.perf_counter())
+
+    threads = [threading.Thread(target=user, name=f'loadgen-user-{i}') for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counter[0]
+
+
+def summarize(recorder, issued, elapsed, timeline):
+    """Turn the collected samples into a JSON-serializable report."""
+    ordered = sorted(recorder.latencies)
+    failed = sum(recorder.errors.values())
+    cpu = [sample['cpu_percent'] for sample in timeline]
+    rss = [sample['rss_bytes'] for sample in timeline]
+    latency = {f'p{int(fraction * 100)}_s': percentile(ordered, fraction) for fraction in PERCENTILES}
+    latency['mean_s'] = statistics.fmean(ordered) if ordered else 0.0
+    latency['max_s'] = ordered[-1] if ordered else 0.0
+    return {
+        'requests': issued,
+        'completed': len(ordered),
+        'errors': failed,
+        'error_rate': failed / issued if issued else 0.0,
+        'error_types': dict(recorder.errors),
+        'elapsed_s': elapsed,
+        'throughput_per_s': len(ordered) / elapsed if elapsed else 0.0,
+        'latency': latency,
+        'cpu_percent_mean': statistics.fmean(cpu) if cpu else None,
+        'cpu_percent_max': max(cpu) if cpu else None,
+        'rss_bytes_max': max(rss) if rss else None,
+        'timeline': timeline,
+    }
+
+
+def run_load(target, requests, rate=None, concurrency=None, duration=None, speed=1.0,
+             interval=1.0, max_inflight=256, seed=1234):
+    """
+    Drive a target with one load step and measure it.
+
+    Args:
+        target (callable): ``target(prompt, style, context_boost)``, raising on error;
+            its ``pids()`` lists the processes whose CPU/RSS to sample
+        requests (list): (offset, prompt, style, context_boost) tuples
+        rate (float): Open-loop arrivals per second (None replays recorded offsets)
+        concurrency (int): Closed-loop users; takes precedence over ``rate``
+        duration (float): Seconds to run (default: one pass over the corpus)
+        speed (float): Replay speed-up for recorded arrival times
+        interval (float): Seconds between CPU/RSS/throughput samples
+        max_inflight (int): Open-loop cap on concurrently outstanding requests
+        seed (int): Seed for Poisson arrivals
+
+    Returns:
+        dict: Throughput, latency percentiles, error rate and a timeline of
+        per-interval CPU, RSS, throughput and p99
+    """
+    if duration is not None and concurrency is None:
+        # Repeat the corpus so a fixed duration never runs out of requests
+        times = arrival_times(requests, rate, speed, seed)
+        span = (times[-1] if times else 0.0) + (1.0 / rate if rate else 1.0)
+        passes = int(duration // span) + 1 if span else 1
+        requests = requests * passes
+        times = [offset + span * i for i in range(passes) for offset in times]
+    elif concurrency is None:
+        times = arrival_times(requests, rate, speed, seed)
+
+    cache_counts = getattr(target, 'cache_counts', None)
+    before = cache_counts() if cache_counts else None
+    recorder = Recorder()
+    monitor = ResourceMonitor(target.pids() or [os.getpid()], recorder, interval).start()
+    start = time.perf_counter()
+    if concurrency is not None:
+        issued = run_closed_loop(target, requests, concurrency, recorder, duration)
+    else:
+        issued = run_open_loop(target, requests, times, recorder, duration, max_inflight)
+    elapsed = time.perf_counter() - start
+    report = summarize(recorder, issued, elapsed, monitor.stop())
+    # Cached results make latencies meaningless as capacity figures, so
+    # always say how many requests were served from the result cache
+    report['cache_hit_rate'] = None
+    if before is not None:
+        hits, misses = (now - then for now, then in zip(cache_counts(), before))
+        report['cache_hit_rate'] = hits / (hits + misses) if hits + misses else 0.0
+    report['mode'] = 'closed' if concurrency is not None else 'open'
+    report['concurrency'] = concurrency
+    report['target_rate'] = rate
+    return report
+
+
+def print_report(report, stream=sys.stdout):
+    """Print a one-step summary and its timeline."""
+    latency = report['latency']
+    load = (f"concurrency {report['concurrency']}" if report['mode'] == 'closed'
+            else f"rate {report['target_rate'] or 'replayed'}")
+    print(f"\n[{load}] {report['completed']}/{report['requests']} ok in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_per_s']:.1f} req/s), error rate {report['error_rate']:.2%}",
+          file=stream)
+    if report['cache_hit_rate'] is not None:
+        print(f"  result cache hit rate: {report['cache_hit_rate']:.1%}", file=stream)
+    print('  latency ms: ' + ', '.join(
+        f"{name[:-2]} {value * 1000:.1f}" for name, value in latency.items()), file=stream)
+    for error, count in report['error_types'].items():
+        print(f'  error {error}: {count}', file=stream)
+    mb = 1024 * 1024
+    print(f"  {'t':>6} {'cpu%':>7} {'rss':>9} {'req/s':>8} {'p99 ms':>8} {'errors':>6}", file=stream)
+    for sample in report['timeline']:
+        print(f"  {sample['t']:6.1f} {sample['cpu_percent']:7.1f} {sample['rss_bytes'] / mb:8.1f}M "
+              f"{sample['throughput_per_s']:8.1f} {sample['p99_s'] * 1000:8.1f} {sample['errors']:6d}",
+              file=stream)
+
+
+def build_parser():
+    """Build the argument parser for the load generator."""
+    parser = argparse.ArgumentParser(description='Generate or replay enhancement traffic.')
+    parser.add_argument('--url', help='Base URL of a local enhancer_server.py (default: in-process)')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--rate', type=float, help='Open-loop requests per second')
+    load.add_argument('--concurrency', help='Closed-loop users, or a comma-separated list of steps')
+    parser.add_argument('--duration', type=float,
+                        help='Seconds per step (default: one pass over the corpus)')
+    parser.add_argument('--corpus', help='JSONL recording of prompts (default: synthetic)')
+    parser.add_argument('--replay', action='store_true',
+                        help="Replay the corpus's recorded 't' arrival times")
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed-up factor')
+    parser.add_argument('--requests', type=int, default=500, help='Synthetic corpus size')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between samples')
+    parser.add_argument('--max-inflight', type=int, default=256,
+                        help='Open-loop cap on outstanding requests')
+    parser.add_argument('--cache', action='store_true',
+                        help='In-process: use the cached global enhancer (reports its hit rate)')
+    parser.add_argument('--seed', type=int, default=1234, help='Seed for corpus and arrivals')
+    parser.add_argument('--output', help='Write the full report as JSON')
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.replay and not args.corpus:
+        parser.error('--replay needs a --corpus with recorded arrival times')
+    if not (args.rate or args.concurrency or args.replay):
+        parser.error('choose --rate, --concurrency or --replay')
+
+    requests = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.requests, args.seed)
+    target = HTTPTarget(args.url) if args.url else InProcessTarget(cache=args.cache)
+
+    if args.concurrency:
+        steps = [{'concurrency': int(value)} for value in args.concurrency.split(',')]
+    else:
+        steps = [{'rate': None if args.replay else args.rate}]
+
+    reports = []
+    for step in steps:
+        report = run_load(target, requests, duration=args.duration, speed=args.speed,
+                          interval=args.interval, max_inflight=args.max_inflight,
+                          seed=args.seed, **step)
+        print_report(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump({'target': args.url or 'in-process', 'steps': reports}, handle, indent=2)
+    return 1 if any(report['errors'] for report in reports) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Enhancer Metrics - In-process counters and histograms for the enhancement pipeline
+
+Metrics can be dumped as Prometheus text exposition format or JSON:
+
+    from enhancer_metrics import REGISTRY
+    print(REGISTRY.to_prometheus())
+    print(REGISTRY.to_json())
+"""
+
+import bisect
+import json
+import threading
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(f'{name}="{str(value)}"' for name, value in pairs)
+    return '{' + body + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter family, one value per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return [{'labels': dict(key), 'value': value} for key, value in self._values.items()]
+
+
+class Histogram:
+    """Cumulative-bucket histogram family, one series per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0
+                }
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), series['counts']):
+                    cumulative += count
+                    samples.append((f'{self.name}_bucket', key + (('le', _format_value(bound)),),
+                                    cumulative))
+                samples.append((f'{self.name}_sum', key, series['sum']))
+                samples.append((f'{self.name}_count', key, series['count']))
+        return samples
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    'labels': dict(key),
+                    'count': series['count'],
+                    'sum': series['sum'],
+                    'mean': series['sum'] / series['count'] if series['count'] else 0.0,
+                    'buckets': dict(zip(
+                        [_format_value(b) for b in self.buckets + (float('inf'),)],
+                        series['counts']
+                    )),
+                }
+                for key, series in self._series.items()
+            ]
+
+
+class MetricsRegistry:
+    """Named collection of metrics that can be exported as a whole."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation=''):
+        """Return the counter called ``name``, creating it if needed."""
+        return self._get_or_create(Counter, name, documentation)
+
+    def histogram(self, name, documentation='', buckets=DEFAULT_BUCKETS):
+        """Return the histogram called ``name``, creating it if needed."""
+        return self._get_or_create(Histogram, name, documentation, buckets=buckets)
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def to_prometheus(self):
+        """Render every metric in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, label_key, value in metric.samples():
+                lines.append(f'{name}{_format_labels(label_key)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Return every metric as plain, JSON-serializable data."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {'type': metric.kind, 'help': metric.documentation,
+                          'series': metric.snapshot()}
+            for metric in metrics
+        }
+
+    def to_json(self, **kwargs):
+        """Render every metric as JSON."""
+        return json.dumps(self.snapshot(), **kwargs)
+
+
+# Default registry shared by every PromptEnhancer
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,321 @@
+"""
+Enhancer Pipeline - Composable enhancement stages with declared inputs and outputs
+
+``PromptEnhancer.enhance_prompt`` runs a fixed sequence of steps. This module
+exposes the same steps as registered ``Stage`` objects so callers can run a
+subset, reorder them or plug in their own:
+
+    from enhancer_pipeline import Pipeline, register_stage
+
+    @register_stage('shout', inputs=('text',), outputs=('text',))
+    def shout(enhancer, text):
+        return str(text).upper()
+
+    pipeline = Pipeline(['expand', 'style', 'shout'])
+    result = pipeline.run("Build an app", style='creative')
+
+Stages read and write named values in a per-request context. Every run
+starts with ``prompt``, ``doc`` (the analyzed prompt), ``text`` (the text
+being enhanced, initially the prompt), ``style`` and ``context_boost``.
+
+Stages are grouped into waves: a stage joins the first wave after every
+earlier stage it depends on (it reads their outputs, or writes what they
+read or write). With ``concurrent=True`` the stages of a wave run on a
+thread pool, so keyword/synonym extraction overlaps sentence expansion.
+Stages declared with ``cache=True`` memoize their outputs by input values;
+cached outputs are shared, so stages must not mutate their inputs.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import prompt_enhancer
+from enhancer_cache import LRUCache
+
+# Context values every run starts with
+INITIAL_KEYS = ('prompt', 'doc', 'text', 'style', 'context_boost')
+# Context values that are not copied into the result
+_INTERNAL_KEYS = {'prompt', 'doc', 'text', 'style', 'context_boost'}
+_UNCACHEABLE = object()
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    ``func(enhancer, *inputs)`` receives the declared inputs in order and
+    returns the single output, or a tuple with one value per output.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), cache=False):
+        if not outputs:
+            raise ValueError(f"Stage {name!r} must declare at least one output")
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.cache = cache
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+    def run(self, enhancer, context):
+        """Run the stage on a context, returning a dict of its outputs."""
+        value = self.func(enhancer, *[context[name] for name in self.inputs])
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: value}
+        return dict(zip(self.outputs, value))
+
+
+# Registered stages, by name
+STAGES = {}
+DEFAULT_STAGES = ('keywords', 'synonyms', 'expand', 'style', 'context_boost', 'refine')
+
+
+def register_stage(name, inputs=(), outputs=(), cache=False, replace=False):
+    """
+    Decorator registering ``func(enhancer, *inputs)`` as a named stage.
+
+    Raises:
+        ValueError: If a stage of that name exists and ``replace`` is False
+    """
+    def decorator(func):
+        if name in STAGES and not replace:
+            raise ValueError(f"Stage {name!r} is already registered")
+        STAGES[name] = Stage(name, func, inputs, outputs, cache)
+        return func
+    return decorator
+
+
+@register_stage('keywords', inputs=('doc',), outputs=('keywords',), cache=True)
+def _keywords_stage(enhancer, doc):
+    return enhancer.extract_keywords(doc)
+
+
+@register_stage('synonyms', inputs=('keywords',), outputs=('synonyms',), cache=True)
+def _synonyms_stage(enhancer, keywords):
+    return enhancer._keyword_synonyms(keywords)
+
+
+@register_stage('expand', inputs=('text',), outputs=('text',), cache=True)
+def _expand_stage(enhancer, text):
+    return enhancer.expand_vague_sentences(text)
+
+
+@register_stage('style', inputs=('text', 'style'), outputs=('text',))
+def _style_stage(enhancer, text, style):
+    return enhancer.apply_style(text, style)
+
+
+@register_stage('context_boost', inputs=('text', 'context_boost'), outputs=('text',))
+def _context_boost_stage(enhancer, text, context_boost):
+    return enhancer.add_context_boost(text, include_context=context_boost)
+
+
+@register_stage('refine', inputs=('text', 'style'), outputs=('text',))
+def _refine_stage(enhancer, text, style):
+    return enhancer._refine_for_style(text, style)
+
+
+def _cache_token(value):
+    """Turn a stage input into a hashable cache key component."""
+    text = getattr(value, 'text', None)
+    if isinstance(text, str):
+        return text
+    if isinstance(value, (list, tuple)):
+        return tuple(_cache_token(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _cache_token(item)) for key, item in value.items()))
+    try:
+        hash(value)
+    except TypeError:
+        return _UNCACHEABLE
+    return value
+
+
+def plan_waves(stages):
+    """
+    Group stages into waves that can run concurrently, keeping declared order.
+
+    Returns:
+        list: Lists of stages; each wave only depends on earlier waves
+    """
+    waves = []
+    wave_of = []
+    for i, stage in enumerate(stages):
+        wave = 0
+        for j in range(i):
+            earlier = stages[j]
+            if (set(stage.inputs) & set(earlier.outputs)
+                    or set(stage.outputs) & (set(earlier.inputs) | set(earlier.outputs))):
+                wave = max(wave, wave_of[j] + 1)
+        wave_of.append(wave)
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append(stage)
+    return waves
+
+
+class Pipeline:
+    """An ordered selection of stages that turns a prompt into a result dict."""
+
+    def __init__(self, stages=DEFAULT_STAGES, enhancer=None, concurrent=False, max_workers=4,
+                 cache_size=1024, cache_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            stages (iterable): Stage names from STAGES and/or Stage objects, in order
+            enhancer (PromptEnhancer): Enhancer whose helpers the stages use
+                (defaults to prompt_enhancer.enhancer)
+            concurrent (bool): Run independent stages on a thread pool
+            max_workers (int): Threads used when ``concurrent`` is set
+            cache_size (int): Entries kept for stages declared with cache=True
+                (0 disables stage caching)
+            cache_bytes (int): Approximate memory budget of the stage cache
+
+        Raises:
+            ValueError: For unknown stage names or inputs no earlier stage provides
+        """
+        resolved = []
+        for stage in stages:
+            if isinstance(stage, str):
+                if stage not in STAGES:
+                    raise ValueError(f"Unknown stage {stage!r}; choose from {', '.join(STAGES)}")
+                stage = STAGES[stage]
+            resolved.append(stage)
+
+        available = set(INITIAL_KEYS)
+        for stage in resolved:
+            missing = [name for name in stage.inputs if name not in available]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} needs {', '.join(missing)}, "
+                                 f"which no earlier stage provides")
+            available.update(stage.outputs)
+
+        self.enhancer = prompt_enhancer.enhancer if enhancer is None else enhancer
+        self.stages = resolved
+        self.waves = plan_waves(resolved)
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+        self.cache = LRUCache(cache_size, cache_bytes)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Pipeline([{', '.join(stage.name for stage in self.stages)}])"
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='enhancer-stage')
+        return self._executor
+
+    def _run_stage(self, stage, context):
+        """Run one stage through the stage cache; returns (outputs, seconds)."""
+        start = time.perf_counter()
+        key = None
+        if stage.cache and self.cache.enabled:
+            key = (stage.name,) + tuple(_cache_token(context[name]) for name in stage.inputs)
+            if _UNCACHEABLE in key:
+                key = None
+            else:
+                outputs = self.cache.get(key)
+                if outputs is not None:
+                    return outputs, time.perf_counter() - start
+        outputs = stage.run(self.enhancer, context)
+        # Fallback outputs from before warm-up finished are not cached
+        if key is not None and prompt_enhancer.is_ready():
+            self.cache.set(key, outputs)
+        return outputs, time.perf_counter() - start
+
+    def run(self, prompt, style='professional', context_boost=False, timings=False):
+        """
+        Enhance a prompt with this pipeline's stages.
+
+        Args:
+            prompt (str): The original prompt text
+            style (str): Enhancement style
+            context_boost (bool): Whether the context boost stage adds its text
+            timings (bool): Add a 'timings' dict of per-stage seconds to the result
+
+        Returns:
+            dict: The enhance_prompt() result schema; stages left out contribute
+            empty values, and outputs of custom stages are added under their names
+        """
+        enhancer = self.enhancer
+        if not prompt or not prompt.strip():
+            return enhancer.enhance_prompt(prompt, style, context_boost)
+
+        start = time.perf_counter()
+        doc = enhancer.analyze(prompt.strip())
+        context = {'prompt': doc.text, 'doc': doc, 'text': doc,
+                   'style': style, 'context_boost': context_boost}
+        stage_times = {}
+
+        for wave in self.waves:
+            if self.concurrent and len(wave) > 1:
+                executor = self._get_executor()
+                futures = [(stage, executor.submit(self._run_stage, stage, context)) for stage in wave]
+                done = [(stage, future.result()) for stage, future in futures]
+            else:
+                done = [(stage, self._run_stage(stage, context)) for stage in wave]
+            for stage, (outputs, seconds) in done:
+                context.update(outputs)
+                stage_times[stage.name] = seconds
+
+        enhanced = str(context['text'])
+        result = {
+            'enhanced_prompt': enhanced,
+            'keywords': list(context.get('keywords', [])),
+            'synonyms': {word: list(syns) for word, syns in context.get('synonyms', {}).items()},
+            'style': style,
+            'context_boost_applied': context_boost,
+            'original_length': doc.word_count,
+            'enhanced_length': len(enhanced.split()),
+        }
+        for name, value in context.items():
+            if name not in _INTERNAL_KEYS and name not in result:
+                result[name] = value
+        enhancer._finish_timings(result, stage_times, start, timings)
+        return result
+
+    def close(self):
+        """Shut down the stage thread pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Pipelines reused across requests, keyed by their tuple of stage names
+MAX_SHARED_PIPELINES = 64
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_pipeline(stages):
+    """Return a process-wide Pipeline on the global enhancer for a list of stage names."""
+    key = tuple(stages)
+    pipeline = _shared.get(key)
+    if pipeline is None:
+        pipeline = Pipeline(key)
+        with _shared_lock:
+            if len(_shared) < MAX_SHARED_PIPELINES:
+                pipeline = _shared.setdefault(key, pipeline)
+    return pipeline
+
+
+def run_pipeline(prompt, stages=DEFAULT_STAGES, style='professional', context_boost=False,
+                 timings=False, concurrent=False):
+    """
+    Enhance a prompt with a one-off pipeline on the global enhancer.
+
+    Build a Pipeline and reuse it instead when running many prompts, so its
+    stage cache and thread pool are shared.
+    """
+    pipeline = Pipeline(stages, concurrent=concurrent)
+    try:
+        return pipeline.run(prompt, style, context_boost, timings)
+    finally:
+        pipeline.close()
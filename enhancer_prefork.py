@@ -0,0 +1,198 @@
+"""
+Prefork Pools - Share loaded NLP models between worker processes copy-on-write
+
+A regular process pool loads spaCy, WordNet and the stopword lists once per
+worker, multiplying memory by the worker count. A prefork pool loads them
+once in the parent, moves every live object into the garbage collector's
+permanent generation (``gc.freeze``) so collections in the children never
+write to those pages, and then forks the workers. The model memory stays
+shared copy-on-write; only pages a worker actually writes to are copied.
+
+Usage:
+    python enhancer_prefork.py --workers 4            # per-worker memory report
+    python enhancer_prefork.py --workers 4 --compare  # versus a spawned pool
+
+Memory figures come from /proc/<pid>/smaps_rollup (Linux):
+    rss  resident memory, counting shared pages in full
+    pss  proportional share, shared pages split between their users
+    uss  unique memory, pages only this process uses
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait
+
+_SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def fork_supported():
+    """Return True if this platform can fork worker processes."""
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def preload(profiles=()):
+    """
+    Load every NLP resource into this process and freeze the heap.
+
+    Args:
+        profiles (iterable): Extra speed profiles whose spaCy pipelines to load
+    """
+    import prompt_enhancer
+    from synonym_index import get_default_index
+
+    prompt_enhancer.warmup()
+    for profile in profiles:
+        prompt_enhancer.get_pipeline(profile)
+
+    # NLTK corpora load lazily on first use; touch them so they are shared
+    enhancer = prompt_enhancer.enhancer
+    enhancer.stop_words
+    if prompt_enhancer.NLTK_AVAILABLE:
+        prompt_enhancer.wordnet.ensure_loaded()
+        prompt_enhancer.sent_tokenize('Warm up.')
+    get_default_index()
+
+    freeze()
+
+
+def freeze():
+    """Collect garbage, then exempt every surviving object from future collections."""
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+
+def create_pool(workers, initializer=None, initargs=(), profiles=()):
+    """
+    Preload models in this process and return a pool of forked workers.
+
+    Raises:
+        RuntimeError: If the platform cannot fork (e.g. Windows)
+    """
+    if not fork_supported():
+        raise RuntimeError('Prefork pools need the fork start method (Linux or macOS)')
+    preload(profiles)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                               initializer=initializer, initargs=initargs)
+
+
+def start_workers(pool, workers):
+    """Make sure every worker has been started; returns their pids."""
+    wait([pool.submit(os.getpid) for _ in range(workers)])
+    return worker_pids(pool)
+
+
+def worker_pids(pool):
+    """Return the pids of a process pool's live workers."""
+    processes = getattr(pool, '_processes', None) or {}
+    return sorted(processes)
+
+
+def process_memory(pid=None):
+    """
+    Return rss/pss/uss/shared in bytes for a process.
+
+    Returns:
+        dict: Memory breakdown, or None where smaps_rollup is unavailable
+    """
+    path = f"/proc/{pid or os.getpid()}/smaps_rollup"
+    values = {}
+    try:
+        with open(path, encoding='ascii') as handle:
+            for line in handle:
+                name, _, rest = line.partition(':')
+                if name in _SMAPS_FIELDS:
+                    values[name] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'uss': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+        'shared': values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0),
+    }
+
+
+def memory_report(pool=None):
+    """
+    Report memory for this process and, if given, every worker of ``pool``.
+
+    Returns:
+        dict: ``parent`` and ``workers`` breakdowns plus the summed worker
+        uss/pss, the figures that show how much copy-on-write sharing saves
+    """
+    workers = []
+    for pid in worker_pids(pool) if pool is not None else []:
+        memory = process_memory(pid)
+        if memory is not None:
+            workers.append(dict(pid=pid, **memory))
+    return {
+        'parent': dict(pid=os.getpid(), **(process_memory() or {})),
+        'workers': workers,
+        'workers_uss': sum(w['uss'] for w in workers),
+        'workers_pss': sum(w['pss'] for w in workers),
+    }
+
+
+def _init_worker():
+    """Load the NLP backends (a no-op in forked workers, which inherit them)."""
+    import prompt_enhancer
+    prompt_enhancer.warmup()
+
+
+def _exercise(prompt):
+    """Run one enhancement so a worker touches the code paths it serves."""
+    from prompt_enhancer import enhance_prompt
+    enhance_prompt(prompt, 'professional', True)
+    return os.getpid()
+
+
+def measure(workers, prefork=True):
+    """Start a pool, run a little work on every worker and report its memory."""
+    if prefork:
+        pool = create_pool(workers, initializer=_init_worker)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   mp_context=multiprocessing.get_context('spawn'))
+    with pool:
+        start_workers(pool, workers)
+        prompts = [f"Make a website for project {i} that looks cool." for i in range(workers * 4)]
+        list(pool.map(_exercise, prompts))
+        return memory_report(pool)
+
+
+def print_report(report, label, stream=sys.stdout):
+    """Print a per-process memory table."""
+    mb = 1024 * 1024
+    print(f"\n[{label}]", file=stream)
+    print(f"  {'process':>14} {'rss':>10} {'pss':>10} {'uss':>10}", file=stream)
+    rows = [('parent', report['parent'])] + [(f"worker {w['pid']}", w) for w in report['workers']]
+    for name, memory in rows:
+        if 'rss' not in memory:
+            continue
+        print(f"  {name:>14} {memory['rss'] / mb:9.1f}M {memory['pss'] / mb:9.1f}M "
+              f"{memory['uss'] / mb:9.1f}M", file=stream)
+    print(f"  workers total: uss {report['workers_uss'] / mb:.1f}M, "
+          f"pss {report['workers_pss'] / mb:.1f}M", file=stream)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Report per-worker memory of a prefork pool.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--compare', action='store_true',
+                        help='Also measure a pool of spawned workers that each load their own models')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        # Measure the spawned pool first, before this process loads any models
+        print_report(measure(args.workers, prefork=False), 'spawned workers')
+    print_report(measure(args.workers, prefork=True), 'prefork workers')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
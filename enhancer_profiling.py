@@ -0,0 +1,275 @@
+"""
+Request Profiling - Opt-in cProfile and tracemalloc reports for single requests
+
+Profiling is off by default. Turn it on for one call:
+
+    enhancer.enhance_prompt(prompt, profiling=True)
+
+or for a share of all requests with environment variables:
+
+    PROMPT_ENHANCER_PROFILING=1      profile every request
+    PROMPT_ENHANCER_PROFILING=100    profile 1 in 100 requests
+    PROMPT_ENHANCER_PROFILING_DIR=/tmp/profiles   (default: ./profiles)
+
+Each profiled request writes two files to the directory:
+
+    <time>-<pid>-<seq>.prof  cProfile stats (pstats, snakeviz, gprof2dot)
+    <time>-<pid>-<seq>.txt   the request, its wall time and peak traced
+                             memory, the slowest functions by cumulative
+                             time and the top allocation sites
+
+Only one request per process is profiled at a time, across every
+enhancer; sampled requests that arrive while another is being profiled
+run normally. tracemalloc runs only for the profiled request, so
+unsampled requests pay one counter increment. Allocations (and, on Python
+3.12+, calls) made by other threads during a profiled request are
+included in its report. At most ``max_reports`` reports are kept; the
+oldest are deleted first. If the directory cannot be created or a report
+cannot be written, the error is printed to stderr and the request still
+succeeds.
+
+Profile one prompt from the command line:
+    python enhancer_profiling.py "Make a website that looks cool" --style creative
+    python enhancer_profiling.py --file huge_paste.txt --output-dir /tmp/profiles
+"""
+
+import argparse
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+DEFAULT_DIR = os.environ.get('PROMPT_ENHANCER_PROFILING_DIR', 'profiles')
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 25
+TRACEBACK_FRAMES = 5
+PROMPT_PREVIEW_CHARS = 500
+
+# cProfile and tracemalloc are process-wide, so every RequestProfiler shares
+# one lock and only one request in the process is profiled at a time
+_ACTIVE = threading.Lock()
+
+
+def sample_rate_from_env(value=None):
+    """
+    Parse PROMPT_ENHANCER_PROFILING into a 1-in-N rate.
+
+    Returns:
+        int: 0 when profiling is off, otherwise N
+    """
+    value = os.environ.get('PROMPT_ENHANCER_PROFILING', '') if value is None else value
+    value = value.strip().lower()
+    if value in ('', '0', 'false', 'no', 'off'):
+        return 0
+    if value in ('true', 'yes', 'on'):
+        return 1
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 0
+
+
+class RequestProfiler:
+    """Decide which requests to profile and write a report for each one."""
+
+    def __init__(self, directory=DEFAULT_DIR, sample_every=0, max_reports=500,
+                 top_functions=TOP_FUNCTIONS, top_allocations=TOP_ALLOCATIONS):
+        """
+        Args:
+            directory (str): Where reports are written (created on first use)
+            sample_every (int): Profile 1 in N requests (0 = only when forced)
+            max_reports (int): Reports kept in the directory (0 = unlimited)
+            top_functions (int): Functions listed in the text report
+            top_allocations (int): Allocation sites listed in the text report
+        """
+        self.directory = directory
+        self.sample_every = sample_every
+        self.max_reports = max_reports
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+        self.reports = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_report = None
+        self._counter = itertools.count(1)
+        self._sequence = itertools.count(1)
+
+    def should_profile(self, force=False):
+        """Return True if this request is forced or falls on the sampling interval."""
+        if force:
+            return True
+        if self.sample_every <= 0:
+            return False
+        return next(self._counter) % self.sample_every == 0
+
+    @contextmanager
+    def profile(self, label='request', **details):
+        """
+        Profile the body of the ``with`` block and write its report.
+
+        Failing to create the directory or write the report is printed to
+        stderr and never raised into the profiled request.
+
+        Args:
+            label (str): What is being profiled (e.g. 'enhance_prompt')
+            **details: Request details recorded in the report; a ``prompt``
+                is summarized by its length and first characters
+
+        Yields:
+            str: Path of the report's .prof file, or None if another request
+            is already being profiled and this one runs unprofiled
+        """
+        if not _ACTIVE.acquire(blocking=False):
+            self.skipped += 1
+            yield None
+            return
+
+        try:
+            try:
+                path = self._report_path(label)
+            except OSError as exc:
+                self._report_error(exc)
+                path = None
+            if path is None:
+                yield None
+                return
+
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(TRACEBACK_FRAMES)
+                before = None
+            else:
+                before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            error = None
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                yield path
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                snapshot = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                try:
+                    self._write(path, label, details, profiler, snapshot, before, elapsed, peak, error)
+                except Exception as exc:
+                    # A broken report must never fail the request it describes
+                    self._report_error(exc)
+        finally:
+            _ACTIVE.release()
+
+    def _report_error(self, exc):
+        self.errors += 1
+        print(f"prompt_enhancer: could not write profile to {self.directory}: {exc}", file=sys.stderr)
+
+    def _report_path(self, label):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        name = f"{stamp}-{os.getpid()}-{next(self._sequence):06d}-{label}.prof"
+        return os.path.join(self.directory, name)
+
+    def _write(self, path, label, details, profiler, snapshot, before, elapsed, peak, error):
+        profiler.dump_stats(path)
+
+        lines = [f"{label}: {elapsed * 1000:.2f} ms, peak traced memory {peak / 1024:.1f} KiB"]
+        if error is not None:
+            lines.append(f"raised {type(error).__name__}: {error}")
+        for key, value in details.items():
+            if key == 'prompt' and isinstance(value, str):
+                lines.append(f"prompt: {len(value)} chars, {len(value.split())} words")
+                lines.append(f"  {value[:PROMPT_PREVIEW_CHARS]!r}")
+            else:
+                lines.append(f"{key}: {value!r}")
+
+        functions = io.StringIO()
+        stats = pstats.Stats(profiler, stream=functions)
+        stats.sort_stats('cumulative').print_stats(self.top_functions)
+        lines.extend(['', f"Top {self.top_functions} functions by cumulative time:",
+                      functions.getvalue().strip()])
+
+        lines.extend(['', f"Top {self.top_allocations} allocation sites:"])
+        lines.extend(f"  {stat}" for stat in allocation_sites(snapshot, before, self.top_allocations))
+
+        with open(path[:-len('.prof')] + '.txt', 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+        self.reports += 1
+        self.last_report = path
+        self._prune()
+
+    def _prune(self):
+        """Delete the oldest reports beyond ``max_reports``."""
+        if not self.max_reports:
+            return
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith('.prof'))
+        except OSError:
+            return
+        for name in names[:max(0, len(names) - self.max_reports)]:
+            for suffix in ('.prof', '.txt'):
+                try:
+                    os.remove(os.path.join(self.directory, name[:-len('.prof')] + suffix))
+                except OSError:
+                    pass
+
+
+def allocation_sites(snapshot, before=None, limit=TOP_ALLOCATIONS):
+    """
+    Return the largest allocation sites of a snapshot.
+
+    Allocations by tracemalloc and this module are excluded; with ``before``
+    only the growth since that snapshot is counted.
+    """
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, __file__)]
+    snapshot = snapshot.filter_traces(filters)
+    if before is not None:
+        return snapshot.compare_to(before.filter_traces(filters), 'lineno')[:limit]
+    return snapshot.statistics('lineno')[:limit]
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Profile the enhancement of one prompt.')
+    parser.add_argument('prompt', nargs='?', help='Prompt text (or use --file)')
+    parser.add_argument('--file', help='Read the prompt from a file')
+    parser.add_argument('--style', default='professional', help='Enhancement style')
+    parser.add_argument('--context-boost', action='store_true', help='Apply context boost')
+    parser.add_argument('--output-dir', default=DEFAULT_DIR, help='Where to write the report')
+    args = parser.parse_args(argv)
+    if args.file:
+        with open(args.file, encoding='utf-8') as handle:
+            prompt = handle.read()
+    elif args.prompt is not None:
+        prompt = args.prompt
+    else:
+        parser.error('give a prompt or --file')
+
+    import prompt_enhancer
+
+    prompt_enhancer.warmup()
+    profiler = RequestProfiler(args.output_dir)
+    enhancer = prompt_enhancer.PromptEnhancer(cache_size=0, profiler=profiler)
+    enhancer.enhance_prompt(prompt, args.style, args.context_boost, profiling=True)
+
+    path = profiler.last_report[:-len('.prof')]
+    with open(path + '.txt', encoding='utf-8') as handle:
+        print(handle.read())
+    print(f"Report written to {path}.prof and {path}.txt", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
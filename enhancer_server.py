@@ -0,0 +1,350 @@
+"""
+Enhancement Server - Lightweight asyncio HTTP/JSON API for prompt enhancement
+
+Usage:
+    python enhancer_server.py --port 8080 --workers 4 --executor process
+    python enhancer_server.py --port 8080 --workers 4 --executor prefork
+
+Endpoints:
+    POST /enhance        {"prompt": "...", "style": "creative", "context_boost": true,
+                          "keywords": false}  (optional; skips keywords and synonyms)
+                         "stages": ["expand", "style"] runs only those pipeline stages
+    POST /enhance/batch  {"prompts": ["...", {"prompt": "...", "style": "detailed"}], "style": "..."}
+    GET  /health         readiness of the NLP backends (503 if a required one failed)
+    GET  /metrics        request (and, with threads, stage) timings in Prometheus format
+    GET  /workers        rss/pss/unique memory of the server and each worker process
+
+Responses use the same schema as ``enhance_prompt``. Connections are kept
+alive (HTTP/1.1) and CPU-bound work runs on a thread or process pool so the
+event loop only parses requests and writes responses. The prefork
+executor loads the models once in the server process and forks workers
+that share them copy-on-write (see enhancer_prefork.py).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from enhancer_metrics import REGISTRY
+from enhancer_prefork import create_pool, memory_report, start_workers
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_SIZE = 1000
+KEEP_ALIVE_TIMEOUT = 15.0
+ROUTES = ('/enhance', '/enhance/batch', '/health', '/metrics', '/workers')
+# Pipeline stages left out of a "stages" request that sets "keywords": false
+KEYWORD_STAGES = ('keywords', 'synonyms')
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error',
+    501: 'Not Implemented', 503: 'Service Unavailable',
+}
+
+
+class HTTPError(Exception):
+    """An error that maps directly to an HTTP error response."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _init_worker():
+    """Load the NLP backends once per worker process."""
+    import prompt_enhancer
+    prompt_enhancer.warmup()
+
+
+def worker_ready():
+    """Worker entry point reporting whether the NLP backends are loaded, and why not."""
+    from prompt_enhancer import is_ready, load_error
+    return is_ready(), load_error()
+
+
+def enhance_one(prompt, style, context_boost, keywords=True):
+    """Worker entry point for a single prompt."""
+    from prompt_enhancer import enhance_prompt
+    return enhance_prompt(prompt, style, context_boost, keywords=keywords)
+
+
+def enhance_stages(prompt, style, context_boost, stages, keywords=True):
+    """Worker entry point running a selection of pipeline stages."""
+    from enhancer_pipeline import shared_pipeline
+    if not keywords:
+        stages = [stage for stage in stages if stage not in KEYWORD_STAGES]
+    return shared_pipeline(stages).run(prompt, style, context_boost)
+
+
+def enhance_many(items, style, context_boost):
+    """Worker entry point for a batch of prompts."""
+    from prompt_enhancer import enhance_prompts
+    return list(enhance_prompts(items, style, context_boost))
+
+
+def _parse_options(payload):
+    """Validate the style/context_boost fields shared by both endpoints."""
+    style = payload.get('style', 'professional')
+    context_boost = payload.get('context_boost', False)
+    if not isinstance(style, str):
+        raise HTTPError(400, '"style" must be a string')
+    if not isinstance(context_boost, bool):
+        raise HTTPError(400, '"context_boost" must be a boolean')
+    return style, context_boost
+
+
+class EnhancementServer:
+    """asyncio HTTP server that dispatches enhancement work to an executor."""
+
+    def __init__(self, host='127.0.0.1', port=8080, workers=None, executor='thread',
+                 max_body=MAX_BODY_BYTES, keep_alive_timeout=KEEP_ALIVE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.executor_kind = executor
+        self.max_body = max_body
+        self.keep_alive_timeout = keep_alive_timeout
+        self.executor = None
+        self._server = None
+        self._request_seconds = REGISTRY.histogram(
+            'prompt_enhancer_http_request_seconds', 'HTTP request latency in seconds.'
+        )
+
+    def _create_executor(self):
+        if self.executor_kind == 'process':
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        if self.executor_kind == 'prefork':
+            pool = create_pool(self.workers, initializer=_init_worker)
+            start_workers(pool, self.workers)
+            return pool
+        _init_worker()
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='enhancer')
+
+    async def start(self):
+        """Start listening; returns once the socket is bound."""
+        self.executor = self._create_executor()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), self.keep_alive_timeout
+                    )
+                except HTTPError as exc:
+                    await self._send(writer, exc.status, {'error': exc.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body, keep_alive = request
+                start = time.perf_counter()
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as exc:
+                    status, payload = exc.status, {'error': exc.message}
+                except Exception as exc:
+                    status, payload = 500, {'error': str(exc)}
+
+                await self._send(writer, status, payload, keep_alive)
+                route = path if path in ROUTES else 'other'
+                self._request_seconds.observe(time.perf_counter() - start,
+                                              path=route, status=status)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader):
+        """Read one request; returns None when the client closed the connection."""
+        request_line = await self._read_line(reader)
+        if not request_line:
+            return None
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line')
+
+        headers = {}
+        while True:
+            line = await self._read_line(reader)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(501, 'Chunked request bodies are not supported')
+        try:
+            length = int(headers.get('content-length', '0'))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            raise HTTPError(400, 'Invalid Content-Length')
+        if length > self.max_body:
+            raise HTTPError(413, f'Request body exceeds {self.max_body} bytes')
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.0':
+            keep_alive = connection == 'keep-alive'
+        else:
+            keep_alive = connection != 'close'
+        return method.upper(), path.split('?', 1)[0], headers, body, keep_alive
+
+    @staticmethod
+    async def _read_line(reader):
+        """Read one request or header line, rejecting lines over the stream limit."""
+        try:
+            return await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HTTPError(400, 'Request line or header too long')
+
+    async def _dispatch(self, method, path, body):
+        if path == '/health':
+            ready, error = await self._run(worker_ready)
+            if error is not None:
+                return 503, {'status': 'error', 'ready': False, 'error': error}
+            return 200, {'status': 'ok', 'ready': ready}
+        if path == '/metrics':
+            # Stage timings are recorded where enhancement runs, so with a
+            # process pool only the HTTP-level metrics appear here.
+            return 200, REGISTRY.to_prometheus()
+        if path == '/workers':
+            pool = self.executor if self.executor_kind != 'thread' else None
+            return 200, memory_report(pool)
+        if path not in ('/enhance', '/enhance/batch'):
+            raise HTTPError(404, f'No route for {path}')
+        if method != 'POST':
+            raise HTTPError(405, f'{path} only accepts POST')
+
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, 'Request body must be valid JSON')
+        if not isinstance(payload, dict):
+            raise HTTPError(400, 'Request body must be a JSON object')
+        style, context_boost = _parse_options(payload)
+
+        if path == '/enhance':
+            prompt = payload.get('prompt')
+            if not isinstance(prompt, str):
+                raise HTTPError(400, '"prompt" must be a string')
+            keywords = payload.get('keywords', True)
+            if not isinstance(keywords, bool):
+                raise HTTPError(400, '"keywords" must be a boolean')
+            stages = payload.get('stages')
+            if stages is not None:
+                if not isinstance(stages, list) or not all(isinstance(s, str) for s in stages):
+                    raise HTTPError(400, '"stages" must be a list of stage names')
+                try:
+                    return 200, await self._run(enhance_stages, prompt, style, context_boost,
+                                                stages, keywords)
+                except ValueError as exc:
+                    raise HTTPError(400, str(exc))
+            if self.executor_kind == 'thread':
+                # Identical concurrent requests share one computation
+                from prompt_enhancer import enhancer
+                result = await enhancer.enhance_prompt_async(prompt, style, context_boost,
+                                                             executor=self.executor,
+                                                             keywords=keywords)
+                return 200, result
+            return 200, await self._run(enhance_one, prompt, style, context_boost, keywords)
+
+        prompts = payload.get('prompts')
+        if not isinstance(prompts, list):
+            raise HTTPError(400, '"prompts" must be a list')
+        if len(prompts) > MAX_BATCH_SIZE:
+            raise HTTPError(413, f'At most {MAX_BATCH_SIZE} prompts per batch')
+        for i, item in enumerate(prompts):
+            if isinstance(item, str):
+                continue
+            if not isinstance(item, dict):
+                raise HTTPError(400, 'Each prompt must be a string or an object')
+            if not isinstance(item.get('prompt'), str):
+                raise HTTPError(400, f'prompts[{i}]: "prompt" must be a string')
+            try:
+                _parse_options(item)
+            except HTTPError as exc:
+                raise HTTPError(400, f'prompts[{i}]: {exc.message}')
+        results = await self._run(enhance_many, prompts, style, context_boost)
+        return 200, {'results': results}
+
+    async def _send(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json'
+        head = (
+            f'HTTP/1.1 {status} {REASONS.get(status, "Unknown")}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+            '\r\n'
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def build_parser():
+    """Build the argument parser for the server."""
+    parser = argparse.ArgumentParser(description='Serve prompt enhancement over HTTP/JSON.')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Executor workers (default: CPU count)')
+    parser.add_argument('--executor', choices=['thread', 'process', 'prefork'], default='thread',
+                        help='Run enhancement on a thread pool, a process pool, or forked '
+                             'processes sharing models loaded once in the server')
+    return parser
+
+
+def main(argv=None):
+    """Entry point for the server."""
+    args = build_parser().parse_args(argv)
+    server = EnhancementServer(args.host, args.port, args.workers, args.executor)
+    print(f"Serving prompt enhancement on http://{args.host}:{args.port} "
+          f"({args.workers} {args.executor} workers)", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+NLTK Resources - Vendor the NLTK data the enhancer needs, once, at build time
+
+The enhancer needs the punkt sentence tokenizer, WordNet and the stopword
+lists. Downloading them lazily at import time stalls on network timeouts in
+locked-down containers, so they are vendored into a local data directory
+during the build instead and the runtime only ever reads from disk.
+
+Vendor the resources (needs network, run once at build/deploy time):
+    python nltk_resources.py vendor
+    python nltk_resources.py vendor --data-dir /path/to/nltk_data
+
+Check that a deployment has everything it needs (exits 1 if not):
+    python nltk_resources.py check
+
+The data directory defaults to ``data/nltk_data`` next to this file and can
+be changed with PROMPT_ENHANCER_NLTK_DATA. It is searched before NLTK's own
+default locations, so resources installed system-wide still work.
+"""
+
+import argparse
+import os
+import sys
+
+DEFAULT_DATA_DIR = os.environ.get(
+    'PROMPT_ENHANCER_NLTK_DATA',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'nltk_data')
+)
+
+# Package name -> resource path checked with nltk.data.find
+RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab/english',
+    'wordnet': 'corpora/wordnet',
+    'stopwords': 'corpora/stopwords/english',
+}
+
+
+class MissingResourceError(RuntimeError):
+    """Raised when vendored NLTK resources are not installed."""
+
+    def __init__(self, missing, search_path):
+        self.missing = missing
+        self.search_path = search_path
+        super().__init__(format_diagnostics(missing, search_path))
+
+
+def required_packages(nltk):
+    """
+    Return the packages the installed NLTK version needs.
+
+    NLTK 3.8.2 replaced the pickled punkt models with ``punkt_tab``, so only
+    the tokenizer data matching the installed version is required.
+    """
+    from nltk.tokenize import punkt
+    tokenizer = 'punkt_tab' if hasattr(punkt, 'PunktTokenizer') else 'punkt'
+    return [tokenizer, 'wordnet', 'stopwords']
+
+
+def configure(nltk, data_dir=DEFAULT_DATA_DIR):
+    """Search ``data_dir`` before NLTK's default data locations."""
+    if data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+
+
+def missing_resources(nltk, packages=None):
+    """Return the required packages that cannot be found on disk."""
+    missing = []
+    for package in packages or required_packages(nltk):
+        try:
+            nltk.data.find(RESOURCES[package])
+        except LookupError:
+            missing.append(package)
+    return missing
+
+
+def format_diagnostics(missing, search_path):
+    """Explain which resources are missing, where they were looked for and how to fix it."""
+    lines = [f"Missing NLTK resources: {', '.join(missing)}", 'Searched:']
+    lines.extend(f'  - {path}' for path in search_path)
+    lines.append("Run 'python nltk_resources.py vendor' at build time to install them.")
+    return '\n'.join(lines)
+
+
+def require(nltk, data_dir=DEFAULT_DATA_DIR):
+    """
+    Point NLTK at the vendored data and verify every resource is present.
+
+    Never touches the network.
+
+    Raises:
+        MissingResourceError: If any required resource is not installed
+    """
+    configure(nltk, data_dir)
+    missing = missing_resources(nltk)
+    if missing:
+        raise MissingResourceError(missing, list(nltk.data.path))
+
+
+def vendor(data_dir=DEFAULT_DATA_DIR, packages=None):
+    """
+    Download resources into ``data_dir``.
+
+    Returns:
+        list: Packages that failed to download
+    """
+    import nltk
+
+    os.makedirs(data_dir, exist_ok=True)
+    configure(nltk, data_dir)
+    failed = []
+    for package in packages or required_packages(nltk):
+        if not nltk.download(package, download_dir=data_dir, quiet=True):
+            failed.append(package)
+    return failed
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Vendor or check the NLTK data the enhancer needs.')
+    parser.add_argument('command', choices=['vendor', 'check'])
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help='Directory holding the vendored data')
+    args = parser.parse_args(argv)
+
+    try:
+        import nltk
+    except ImportError:
+        print('NLTK is not installed', file=sys.stderr)
+        return 1
+
+    if args.command == 'vendor':
+        failed = vendor(args.data_dir)
+        if failed:
+            print(f"Failed to download: {', '.join(failed)}", file=sys.stderr)
+            return 1
+
+    try:
+        require(nltk, args.data_dir)
+    except MissingResourceError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"NLTK resources ready in {args.data_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,63 +3,551 @@ Prompt Enhancement Module - Lightweight Pure-Python Version
 No sklearn dependencies, works with basic Python + optional spaCy/NLTK
 """
 
+import asyncio
+import heapq
+import io
+import os
 import re
+import sys
+import threading
+import time
 import warnings
+from collections.abc import Mapping
+
+# Command-line batch mode: python -m prompt_enhancer batch in.jsonl out.jsonl
+# Hand over before any module-level setup runs here; enhancer_batch imports
+# this file again as ``prompt_enhancer``, which then loads the models and
+# builds the global enhancer exactly once.
+if __name__ == '__main__' and sys.argv[1:2] == ['batch']:
+    from enhancer_batch import main as _batch_main
+    sys.exit(_batch_main(sys.argv[2:]))
+
+from enhancer_cache import LRUCache, PersistentCache
+from enhancer_metrics import REGISTRY
+from enhancer_profiling import DEFAULT_DIR as PROFILING_DIR, RequestProfiler, sample_rate_from_env
+from nltk_resources import MissingResourceError, require as require_nltk_resources
+from statistical_keywords import STOP_WORDS as STATISTICAL_STOP_WORDS, extract_keywords as statistical_keywords
+from synonym_index import get_default_index
 
 warnings.filterwarnings("ignore")
 
-# Optional imports - graceful fallback if not available
+# Optional imports - graceful fallback if not available.
+# The heavy NLP backends are loaded by warmup(); until it finishes the
+# flags below stay False and every stage uses the regex fallback path.
 NLTK_AVAILABLE = False
 SPACY_AVAILABLE = False
+nltk = None
 nlp = None
+wordnet = None
+stopwords = None
+sent_tokenize = None
+NLTK_ERROR = None
 
-try:
-    import nltk
-    from nltk.corpus import wordnet, stopwords
-    from nltk.tokenize import sent_tokenize, word_tokenize
-    NLTK_AVAILABLE = True
-    
-    # Download resources silently
+# NLTK data is vendored at build time (see nltk_resources.py) and never
+# downloaded at runtime. When it is missing NLTK is disabled with a
+# diagnostic on stderr. If this is set the failure is fatal instead: an
+# eager import raises, blocking warmup() calls raise, and is_ready() stays
+# False so health checks report it.
+REQUIRE_NLTK = os.environ.get('PROMPT_ENHANCER_REQUIRE_NLTK', '').strip().lower() in ('1', 'true', 'yes')
+
+# How the NLP backends are loaded when this module is imported:
+#   eager      - load synchronously at import (default, original behaviour)
+#   background - start loading on a daemon thread at import
+#   lazy       - load nothing at import; the first enhancement starts the
+#                background warm-up and is served by the regex fallback
+LOAD_MODE = os.environ.get('PROMPT_ENHANCER_LOAD_MODE', 'eager').strip().lower()
+
+# Speed profiles trade keyword quality for throughput by trimming the spaCy
+# pipeline (see README "Speed Profiles" for measured throughput):
+#   fast     - no spaCy at all; regex keyword extraction
+#   balanced - tagger + NER only (parser and lemmatizer excluded), no noun chunks
+#   accurate - full keyword extraction; only the unused lemmatizer is excluded
+PROFILES = {
+    'fast': {'spacy': False, 'exclude': (), 'entities': False, 'noun_chunks': False},
+    'balanced': {'spacy': True, 'exclude': ('lemmatizer', 'parser'),
+                 'entities': True, 'noun_chunks': False},
+    'accurate': {'spacy': True, 'exclude': ('lemmatizer',),
+                 'entities': True, 'noun_chunks': True},
+}
+DEFAULT_PROFILE = os.environ.get('PROMPT_ENHANCER_PROFILE', 'accurate').strip().lower()
+if DEFAULT_PROFILE not in PROFILES:
+    DEFAULT_PROFILE = 'accurate'
+
+# Keyword extraction backends:
+#   spacy       - entities, nouns and noun chunks from the profile's spaCy
+#                 pipeline, falling back to regex when spaCy is unavailable
+#   statistical - pure-Python RAKE/YAKE-style phrases (statistical_keywords.py)
+#   regex       - every long non-stopword token, in order of appearance
+KEYWORD_BACKENDS = ('spacy', 'statistical', 'regex')
+DEFAULT_KEYWORD_BACKEND = os.environ.get('PROMPT_ENHANCER_KEYWORDS', 'spacy').strip().lower()
+if DEFAULT_KEYWORD_BACKEND not in KEYWORD_BACKENDS:
+    DEFAULT_KEYWORD_BACKEND = 'spacy'
+
+# Bump whenever a change alters enhancement output, so persistent cache
+# entries written by older code are no longer served.
+PIPELINE_VERSION = 2
+
+# Optional SQLite cache shared by every process on the host (see PersistentCache)
+CACHE_DB = os.environ.get('PROMPT_ENHANCER_CACHE_DB')
+
+_load_lock = threading.Lock()
+# Guards only the start of the warm-up thread, never the load itself, so
+# requests that arrive mid-load fall back to regex instead of waiting
+_start_lock = threading.Lock()
+_pipeline_lock = threading.Lock()
+_pipelines = {}
+_ready = threading.Event()
+_warmup_thread = None
+# The MissingResourceError of a required backend that failed to load
+LOAD_ERROR = None
+
+
+def _load_nltk():
+    """Import NLTK and its vendored corpora, setting the module-level handles."""
+    global NLTK_AVAILABLE, NLTK_ERROR, nltk, wordnet, stopwords, sent_tokenize
     try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt', quiet=True)
+        import nltk
+        from nltk.corpus import wordnet as _wordnet, stopwords as _stopwords
+        from nltk.tokenize import sent_tokenize as _sent_tokenize
+
+        require_nltk_resources(nltk)
+
+        wordnet, stopwords, sent_tokenize = _wordnet, _stopwords, _sent_tokenize
+        NLTK_AVAILABLE = True
+    except MissingResourceError as exc:
+        NLTK_AVAILABLE = False
+        NLTK_ERROR = str(exc)
+        if REQUIRE_NLTK:
+            raise
+        print(f"prompt_enhancer: NLTK disabled, using regex fallbacks.\n{exc}", file=sys.stderr)
+    except (ImportError, Exception) as exc:
+        NLTK_AVAILABLE = False
+        NLTK_ERROR = str(exc)
+
+
+def _load_pipeline(exclude):
+    """Load (once) the spaCy English pipeline without the excluded components."""
+    with _pipeline_lock:
+        if exclude not in _pipelines:
+            try:
+                import spacy
+                _pipelines[exclude] = spacy.load("en_core_web_sm", exclude=list(exclude))
+            except (ImportError, Exception):
+                _pipelines[exclude] = None
+        return _pipelines[exclude]
+
+
+def _load_spacy():
+    """Load the default profile's spaCy pipeline into the module-level ``nlp``."""
+    global SPACY_AVAILABLE, nlp
+    settings = PROFILES[DEFAULT_PROFILE]
+    nlp = _load_pipeline(settings['exclude']) if settings['spacy'] else None
+    SPACY_AVAILABLE = nlp is not None
+
+
+def get_pipeline(profile=None):
+    """
+    Return the spaCy pipeline for a speed profile.
     
-    try:
-        nltk.data.find('corpora/wordnet')
-    except LookupError:
-        nltk.download('wordnet', quiet=True)
+    Returns None for the 'fast' profile, while the backends are still
+    loading, or when spaCy or its model is not installed.
+    """
+    settings = PROFILES[profile or DEFAULT_PROFILE]
+    if not settings['spacy'] or not _ready.is_set():
+        return None
+    if settings['exclude'] in _pipelines:
+        return _pipelines[settings['exclude']]
+    return _load_pipeline(settings['exclude'])
+
+
+def _load_backends():
+    """Load every optional NLP backend exactly once."""
+    global LOAD_ERROR
+    with _load_lock:
+        if _ready.is_set():
+            return
+        try:
+            try:
+                _load_nltk()
+            except MissingResourceError as exc:
+                # Only raised with REQUIRE_NLTK; spaCy still loads, but the
+                # failure is kept so readiness checks and warmup() report it
+                LOAD_ERROR = exc
+            _load_spacy()
+        finally:
+            _ready.set()
+
+
+def is_ready():
+    """Return True once the NLP backends have loaded without a required one failing."""
+    return _ready.is_set() and LOAD_ERROR is None
+
+
+def load_error():
+    """Return why a required backend failed to load, or None."""
+    return None if LOAD_ERROR is None else str(LOAD_ERROR)
+
+
+def warmup(block=True, timeout=None):
+    """
+    Load the NLP backends (NLTK corpora and the spaCy model).
     
-    try:
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        nltk.download('stopwords', quiet=True)
+    Args:
+        block (bool): Wait for loading to finish. If False, loading runs on
+            a daemon thread and this call returns immediately.
+        timeout (float): Maximum seconds to wait when blocking
+    
+    Returns:
+        bool: True if the backends are ready when this call returns
+    
+    Raises:
+        MissingResourceError: When blocking and PROMPT_ENHANCER_REQUIRE_NLTK
+            is set but the NLTK data is missing
+    """
+    global _warmup_thread
+    if _ready.is_set():
+        if block and LOAD_ERROR is not None:
+            raise LOAD_ERROR
+        return is_ready()
+    
+    with _start_lock:
+        if _warmup_thread is None and not _ready.is_set():
+            _warmup_thread = threading.Thread(
+                target=_load_backends, name='prompt-enhancer-warmup', daemon=True
+            )
+            _warmup_thread.start()
+    
+    if block:
+        _ready.wait(timeout)
+        if LOAD_ERROR is not None:
+            raise LOAD_ERROR
+    return is_ready()
+
+
+if LOAD_MODE == 'background':
+    warmup(block=False)
+elif LOAD_MODE != 'lazy':
+    _load_backends()
+    if LOAD_ERROR is not None:
+        raise LOAD_ERROR
+
+
+_WORD_RE = re.compile(r'\b\w+\b')
+_SENTENCE_END_RE = re.compile(r'[.!?]+')
+_CHUNK_BOUNDARY_RE = re.compile(r'[.!?]+\s+')
+
+
+def _basic_sentence_split(text):
+    """Split text on runs of sentence-ending punctuation."""
+    sentences = _SENTENCE_END_RE.split(text)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+class RuleMatcher:
+    """
+    Ordered substring rules compiled into one alternation regex.
+    
+    ``match`` returns the value of the highest-priority key that occurs
+    anywhere in the text, exactly like testing ``key in text`` for each rule
+    in order, but with a single scan of the text.
+    """
+    
+    def __init__(self, rules, default=None):
+        self.rules = list(rules)
+        self.default = default
+        self._priority = {}
+        for i, (key, _) in enumerate(self.rules):
+            self._priority.setdefault(key, i)
         
-except (ImportError, Exception):
-    NLTK_AVAILABLE = False
+        keys = sorted(self._priority, key=len, reverse=True)
+        # At a given position the regex reports only the longest key, so
+        # remember the best priority among every key that prefixes it.
+        self._best = {
+            key: min(self._priority[k] for k in keys if key.startswith(k))
+            for key in keys
+        }
+        pattern = '|'.join(re.escape(key) for key in keys)
+        self._regex = re.compile(f'(?=({pattern}))') if keys else None
+    
+    def match(self, text):
+        """Return the value of the highest-priority key found in text."""
+        if self._regex is None:
+            return self.default
+        best = None
+        for found in self._regex.finditer(text):
+            priority = self._best[found.group(1)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.default if best is None else self.rules[best][1]
 
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    SPACY_AVAILABLE = True
-except (ImportError, Exception):
-    SPACY_AVAILABLE = False
-    nlp = None
+
+class AnalyzedText:
+    """
+    A piece of text with its analysis views computed at most once.
+    
+    Sentences, per-sentence lowercase strings and word tokens are built
+    lazily on first access and then shared by every enhancement stage that
+    receives the same object, instead of each stage re-splitting and
+    re-lowercasing the raw string.
+    """
+    
+    __slots__ = ('text', '_split', '_lower', '_sentences', '_basic_sentences',
+                 '_sentence_lowers', '_sentence_tokens', '_tokens')
+    
+    def __init__(self, text, split_sentences=_basic_sentence_split):
+        self.text = text
+        self._split = split_sentences
+        self._lower = None
+        self._sentences = None
+        self._basic_sentences = None
+        self._sentence_lowers = None
+        self._sentence_tokens = None
+        self._tokens = None
+    
+    def __str__(self):
+        return self.text
+    
+    @property
+    def lower(self):
+        """Lowercase view of the whole text."""
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+    
+    @property
+    def sentences(self):
+        """Sentences from the preferred splitter (NLTK punkt when loaded)."""
+        if self._sentences is None:
+            self._sentences = self._split(self.text)
+        return self._sentences
+    
+    @property
+    def basic_sentences(self):
+        """Sentences from the regex splitter, regardless of NLTK."""
+        if self._basic_sentences is None:
+            self._basic_sentences = _basic_sentence_split(self.text)
+        return self._basic_sentences
+    
+    @property
+    def sentence_lowers(self):
+        """Lowercase view of each sentence."""
+        if self._sentence_lowers is None:
+            self._sentence_lowers = [sent.lower() for sent in self.sentences]
+        return self._sentence_lowers
+    
+    @property
+    def sentence_tokens(self):
+        """Lowercase word tokens of each sentence."""
+        if self._sentence_tokens is None:
+            self._sentence_tokens = [_WORD_RE.findall(sent) for sent in self.sentence_lowers]
+        return self._sentence_tokens
+    
+    @property
+    def tokens(self):
+        """Lowercase word tokens of the whole text, in order."""
+        if self._tokens is None:
+            # Sentence splitting never cuts through a word, so the per-sentence
+            # tokens concatenate to the tokens of the whole text.
+            self._tokens = [token for tokens in self.sentence_tokens for token in tokens]
+        return self._tokens
+    
+    @property
+    def word_count(self):
+        """Number of whitespace-separated words."""
+        return len(self.text.split())
+
+
+class EnhancementResult(Mapping):
+    """
+    Compact enhancement result whose keywords and synonyms are computed lazily.
+    
+    Supports the same read access as the result dict (``result['keywords']``,
+    ``.get()``, iteration, ``==`` against a dict); ``keywords`` and
+    ``synonyms`` run their stages the first time they are read. Use
+    ``to_dict()`` where a real dict is needed, e.g. for ``json.dumps``.
+    """
+    
+    FIELDS = ('enhanced_prompt', 'keywords', 'synonyms', 'style', 'context_boost_applied',
+              'original_length', 'enhanced_length')
+    
+    __slots__ = ('enhanced_prompt', 'style', 'context_boost_applied', 'original_length',
+                 'enhanced_length', '_keywords', '_synonyms', '_keyword_source',
+                 '_synonym_source', '_extra')
+    
+    def __init__(self, enhanced_prompt, style, context_boost_applied, original_length,
+                 enhanced_length, keywords=None, synonyms=None, keyword_source=None,
+                 synonym_source=None):
+        """
+        Args:
+            keywords (list): Precomputed keywords, or None to call ``keyword_source()``
+            synonyms (dict): Precomputed synonyms, or None to call
+                ``synonym_source(keywords)``
+            keyword_source (callable): Computes the keywords; [] if not given
+            synonym_source (callable): Computes synonyms from keywords; {} if not given
+        """
+        self.enhanced_prompt = enhanced_prompt
+        self.style = style
+        self.context_boost_applied = context_boost_applied
+        self.original_length = original_length
+        self.enhanced_length = enhanced_length
+        self._keywords = keywords
+        self._synonyms = synonyms
+        self._keyword_source = keyword_source
+        self._synonym_source = synonym_source
+        self._extra = None
+    
+    @classmethod
+    def from_dict(cls, result, **kwargs):
+        """Build a result from a result dict, keeping extra keys such as 'timings'."""
+        fields = {name: result[name] for name in cls.FIELDS
+                  if name not in ('keywords', 'synonyms')}
+        fields.setdefault('keywords', result.get('keywords'))
+        fields.setdefault('synonyms', result.get('synonyms'))
+        fields.update(kwargs)
+        obj = cls(**fields)
+        for key in result:
+            if key not in cls.FIELDS:
+                obj[key] = result[key]
+        return obj
+    
+    @property
+    def keywords(self):
+        """Extracted keywords, computed on first access."""
+        if self._keywords is None:
+            source, self._keyword_source = self._keyword_source, None
+            self._keywords = source() if source is not None else []
+        return self._keywords
+    
+    @property
+    def synonyms(self):
+        """Synonyms of the top keywords, computed on first access."""
+        if self._synonyms is None:
+            source, self._synonym_source = self._synonym_source, None
+            self._synonyms = source(self.keywords) if source is not None else {}
+        return self._synonyms
+    
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+    
+    def __setitem__(self, key, value):
+        if key in ('keywords', 'synonyms'):
+            setattr(self, '_' + key, value)
+        elif key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+    
+    def __iter__(self):
+        yield from self.FIELDS
+        if self._extra:
+            yield from self._extra
+    
+    def __len__(self):
+        return len(self.FIELDS) + len(self._extra or ())
+    
+    def __repr__(self):
+        return f"EnhancementResult({self.enhanced_prompt!r}, style={self.style!r})"
+    
+    def to_dict(self):
+        """Return a plain dict, computing keywords and synonyms if needed."""
+        return dict(self.items())
 
 
 class PromptEnhancer:
     """Main class for prompt enhancement - Pure Python with optional NLP."""
     
-    def __init__(self):
-        """Initialize the enhancer."""
-        # Load stopwords with fallback
-        try:
-            if NLTK_AVAILABLE:
-                self.stop_words = set(stopwords.words('english'))
-            else:
-                self.stop_words = self._get_fallback_stopwords()
-        except:
-            self.stop_words = self._get_fallback_stopwords()
+    # Elaborations appended to short sentences, checked in priority order
+    ELABORATIONS = [
+        ('make', 'by implementing best practices'),
+        ('build', 'with proper architecture and design'),
+        ('create', 'ensuring functionality and user experience'),
+        ('design', 'with attention to detail and user needs'),
+        ('develop', 'following structured methodology'),
+        ('improve', 'through systematic enhancement'),
+        ('add', 'with appropriate integration'),
+        ('use', 'for maximum effectiveness'),
+        ('write', 'with clear structure and organization'),
+        ('get', 'through effective implementation'),
+    ]
+    DEFAULT_ELABORATION = "with comprehensive specifications"
+    
+    # Common weak starters removed from the first sentence
+    WEAK_STARTERS = ['Make', 'Build', 'Create', 'Design', 'Develop', 'Add', 'Use', 'Try', 'Write', 'Get']
+    
+    def __init__(self, cache_size=1024, cache_bytes=32 * 1024 * 1024, metrics=None,
+                 profile=None, persistent_cache=None, keyword_backend=None, profiler=None):
+        """
+        Initialize the enhancer.
+        
+        Args:
+            cache_size (int): Maximum cached results (0 disables caching).
+                Keyword and synonym caches are sized relative to this.
+            cache_bytes (int): Approximate memory budget for the result cache
+            metrics (MetricsRegistry): Where stage timings are recorded
+                (defaults to enhancer_metrics.REGISTRY)
+            profile (str): Speed profile - 'fast', 'balanced' or 'accurate'
+                (defaults to PROMPT_ENHANCER_PROFILE, else 'accurate')
+            persistent_cache (PersistentCache or str): On-disk cache, or the
+                path of its SQLite database, consulted after the memory caches
+            keyword_backend (str): 'spacy', 'statistical' or 'regex' (defaults
+                to PROMPT_ENHANCER_KEYWORDS, else 'spacy')
+            profiler (RequestProfiler): Writes cProfile/tracemalloc reports for
+                sampled or flagged requests (defaults to one configured by
+                PROMPT_ENHANCER_PROFILING and PROMPT_ENHANCER_PROFILING_DIR)
+        """
+        profile = profile or DEFAULT_PROFILE
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}; choose from {', '.join(PROFILES)}")
+        self.profile = profile
+        self._profile_settings = PROFILES[profile]
+        keyword_backend = keyword_backend or DEFAULT_KEYWORD_BACKEND
+        if keyword_backend not in KEYWORD_BACKENDS:
+            raise ValueError(f"Unknown keyword backend {keyword_backend!r}; "
+                             f"choose from {', '.join(KEYWORD_BACKENDS)}")
+        self.keyword_backend = keyword_backend
+        self._statistical_stop_words = None
+        self._stop_words = None
+        self._fallback_stop_words = self._get_fallback_stopwords()
+        
+        # Results depend on (prompt, style, context_boost); keywords and
+        # synonyms do not depend on style, so they are cached separately.
+        self.result_cache = LRUCache(cache_size, cache_bytes)
+        self.keyword_cache = LRUCache(cache_size, cache_bytes // 4)
+        self.synonym_cache = LRUCache(cache_size * 4, cache_bytes // 4)
+        # Per-sentence expansions and keyword candidates for enhance_incremental()
+        self.sentence_cache = LRUCache(cache_size * 8, cache_bytes // 4)
+        if isinstance(persistent_cache, str):
+            persistent_cache = PersistentCache(persistent_cache)
+        self.persistent_cache = persistent_cache
+        if profiler is None:
+            profiler = RequestProfiler(PROFILING_DIR, sample_rate_from_env())
+        self.profiler = profiler
+        
+        self.metrics = REGISTRY if metrics is None else metrics
+        self._stage_seconds = self.metrics.histogram(
+            'prompt_enhancer_stage_seconds', 'Wall time per enhancement stage in seconds.'
+        )
+        self._requests = self.metrics.counter(
+            'prompt_enhancer_requests_total', 'Enhancement requests by result cache outcome.'
+        )
+        self._coalesced = self.metrics.counter(
+            'prompt_enhancer_coalesced_total', 'Async requests that joined an identical in-flight request.'
+        )
+        self._incremental_sentences = self.metrics.counter(
+            'prompt_enhancer_incremental_sentences_total',
+            'Sentences seen by enhance_incremental, by whether they were reused or recomputed.'
+        )
+        
+        # In-flight async computations, keyed by (event loop, request key)
+        self._inflight = {}
         
         self.style_templates = {
             'professional': {
@@ -83,6 +571,44 @@ class PromptEnhancer:
                 'tone_words': ['simple', 'clean', 'easy to use', 'straightforward', 'minimal']
             }
         }
+        
+        self.compile_rules()
+    
+    def compile_rules(self):
+        """
+        Compile the rewriting rules into matchers used by every request.
+        
+        Call this again after editing ``style_templates``, ``ELABORATIONS``
+        or ``WEAK_STARTERS`` on an existing instance.
+        """
+        self._elaboration_matcher = RuleMatcher(self.ELABORATIONS, self.DEFAULT_ELABORATION)
+        starters = sorted({s.lower() for s in self.WEAK_STARTERS}, key=len, reverse=True)
+        self._weak_starter_re = re.compile('|'.join(re.escape(s) for s in starters))
+        self._filler_re = re.compile(r'\b(very|extremely|highly|significantly)\s+', re.IGNORECASE)
+        self._style_rules = {
+            name: (template['prefixes'][0], template['additions'][0])
+            for name, template in self.style_templates.items()
+        }
+    
+    @property
+    def stop_words(self):
+        """Stopword set, upgraded to NLTK's list once the backends are ready."""
+        if self._stop_words is None:
+            if not is_ready():
+                return self._fallback_stop_words
+            # Load stopwords with fallback
+            try:
+                if NLTK_AVAILABLE:
+                    self._stop_words = set(stopwords.words('english'))
+                else:
+                    self._stop_words = self._get_fallback_stopwords()
+            except:
+                self._stop_words = self._get_fallback_stopwords()
+        return self._stop_words
+    
+    @stop_words.setter
+    def stop_words(self, value):
+        self._stop_words = set(value)
     
     @staticmethod
     def _get_fallback_stopwords():
@@ -98,55 +624,108 @@ class PromptEnhancer:
     
     def _basic_tokenize(self, text):
         """Basic tokenization without NLTK."""
-        text = text.lower()
-        words = re.findall(r'\b\w+\b', text)
-        return words
+        return _WORD_RE.findall(text.lower())
     
     def _basic_sentence_split(self, text):
         """Basic sentence splitting without NLTK."""
-        sentences = re.split(r'[.!?]+', text)
-        return [s.strip() for s in sentences if s.strip()]
+        return _basic_sentence_split(text)
+    
+    def _split_sentences(self, text):
+        """Split sentences with NLTK punkt when loaded, else the regex splitter."""
+        if NLTK_AVAILABLE:
+            try:
+                return sent_tokenize(text)
+            except:
+                pass
+        return _basic_sentence_split(text)
+    
+    def analyze(self, text):
+        """Wrap text in an AnalyzedText; already-analyzed text is returned as is."""
+        if isinstance(text, AnalyzedText):
+            return text
+        return AnalyzedText(text, self._split_sentences)
     
     def extract_keywords(self, text):
         """Extract important keywords from text using available tools."""
-        keywords = []
-        
-        if SPACY_AVAILABLE and nlp is not None:
+        doc = self.analyze(text)
+        keywords = self._cache_get(self.keyword_cache, 'keywords', doc.text)
+        if keywords is None:
+            keywords = self._extract_keywords_uncached(doc)
+            self._cache_set(self.keyword_cache, 'keywords', doc.text, keywords)
+        return list(keywords)
+    
+    def _keyword_pipeline(self):
+        """Return the spaCy pipeline used for keywords, or None if spaCy is not used."""
+        if self.keyword_backend != 'spacy':
+            return None
+        return get_pipeline(self.profile)
+    
+    def _extract_keywords_uncached(self, doc):
+        """Run keyword extraction without consulting the cache."""
+        if self.keyword_backend == 'statistical':
+            return self._extract_keywords_statistical(doc)
+        pipeline = self._keyword_pipeline()
+        if pipeline is not None:
             try:
-                doc = nlp(text)
-                # Extract named entities
-                for ent in doc.ents:
-                    if len(ent.text) > 2:
-                        keywords.append(ent.text.lower())
-                
-                # Extract nouns
-                for token in doc:
-                    if token.pos_ in ['NOUN', 'PROPN'] and not token.is_stop:
-                        keywords.append(token.text.lower())
-                
-                # Extract noun chunks
-                for noun_chunk in doc.noun_chunks:
-                    if len(noun_chunk.text.split()) > 1 and len(noun_chunk.text) > 2:
-                        keywords.append(noun_chunk.text.lower())
-                        
+                keywords = self._keywords_from_doc(pipeline(doc.text))
                 if keywords:
-                    return self._deduplicate_keywords(keywords)
+                    return keywords
             except:
                 pass
         
         # Fallback to basic extraction
-        return self._extract_keywords_basic(text)
+        return self._extract_keywords_basic(doc)
+    
+    def _keywords_from_doc(self, doc):
+        """Collect entity, noun and noun-chunk keywords from a spaCy Doc."""
+        entities, nouns, chunks = self._keyword_candidates(doc)
+        return self._deduplicate_keywords(entities + nouns + chunks)
+    
+    def _keyword_candidates(self, doc):
+        """Return the (entities, nouns, noun chunks) keyword candidates of a spaCy Doc."""
+        settings = self._profile_settings
+        entities, nouns, chunks = [], [], []
+        
+        # Extract named entities
+        if settings['entities']:
+            for ent in doc.ents:
+                if len(ent.text) > 2:
+                    entities.append(ent.text.lower())
+        
+        # Extract nouns
+        for token in doc:
+            if token.pos_ in ['NOUN', 'PROPN'] and not token.is_stop:
+                nouns.append(token.text.lower())
+        
+        # Extract noun chunks (needs the dependency parser)
+        if settings['noun_chunks']:
+            for noun_chunk in doc.noun_chunks:
+                if len(noun_chunk.text.split()) > 1 and len(noun_chunk.text) > 2:
+                    chunks.append(noun_chunk.text.lower())
+        
+        return entities, nouns, chunks
     
     def _extract_keywords_basic(self, text):
         """Basic keyword extraction using regex."""
-        words = self._basic_tokenize(text)
+        words = self.analyze(text).tokens
+        stop_words = self.stop_words
         keywords = []
         for word in words:
-            if len(word) > 3 and word not in self.stop_words:
+            if len(word) > 3 and word not in stop_words:
                 keywords.append(word)
         
         return self._deduplicate_keywords(keywords)
     
+    def _extract_keywords_statistical(self, text):
+        """RAKE/YAKE-style keyword and key phrase extraction in pure Python."""
+        doc = self.analyze(text)
+        stop_words = self.stop_words
+        # Rebuilt only when stop_words switches to NLTK's list after warm-up
+        cached = self._statistical_stop_words
+        if cached is None or cached[0] is not stop_words:
+            cached = self._statistical_stop_words = (stop_words, STATISTICAL_STOP_WORDS | stop_words)
+        return statistical_keywords(doc.sentence_lowers, cached[1])
+    
     def _deduplicate_keywords(self, keywords):
         """Remove duplicates while preserving order."""
         seen = set()
@@ -159,12 +738,24 @@ class PromptEnhancer:
         return unique_keywords[:10]  # Return top 10
     
     def get_synonyms(self, word):
-        """Get synonyms for a word using WordNet if available."""
+        """Get synonyms for a word using the synonym index or WordNet if available."""
+        synonyms = self._cache_get(self.synonym_cache, 'synonyms', word)
+        if synonyms is None:
+            synonyms = self._get_synonyms_uncached(word)
+            self._cache_set(self.synonym_cache, 'synonyms', word, synonyms)
+        return list(synonyms)
+    
+    def _get_synonyms_uncached(self, word):
+        """Look up synonyms without consulting the cache."""
+        # A prebuilt index (see synonym_index.py) avoids WordNet entirely
+        index = get_default_index()
+        if index is not None:
+            return index.lookup(word)
+        
         if not NLTK_AVAILABLE:
             return []
         
         try:
-            from nltk.corpus import wordnet
             synonyms = set()
             for syn in wordnet.synsets(word):
                 for lemma in syn.lemmas():
@@ -177,92 +768,62 @@ class PromptEnhancer:
     
     def expand_vague_sentences(self, text):
         """Expand vague or simple sentences with more detail."""
-        # Try NLTK sentence splitting first
-        if NLTK_AVAILABLE:
-            try:
-                sentences = sent_tokenize(text)
-            except:
-                sentences = self._basic_sentence_split(text)
-        else:
-            sentences = self._basic_sentence_split(text)
-        
+        doc = self.analyze(text)
         enhanced_sentences = []
         
-        for sent in sentences:
-            words = self._basic_tokenize(sent)
-            
+        for sent, sent_lower, words in zip(doc.sentences, doc.sentence_lowers, doc.sentence_tokens):
             # If sentence is very short, add elaboration
             if len(words) < 8:
-                elaboration = self._get_elaboration(sent)
+                elaboration = self._get_elaboration(sent, sent_lower)
                 enhanced_sentences.append(f"{sent.strip()} {elaboration}.")
             else:
                 enhanced_sentences.append(sent.strip())
         
         return ' '.join(enhanced_sentences)
     
-    def _get_elaboration(self, sentence):
+    def _get_elaboration(self, sentence, sentence_lower=None):
         """Add elaboration to sentences based on context."""
-        elaborations = {
-            'make': 'by implementing best practices',
-            'build': 'with proper architecture and design',
-            'create': 'ensuring functionality and user experience',
-            'design': 'with attention to detail and user needs',
-            'develop': 'following structured methodology',
-            'improve': 'through systematic enhancement',
-            'add': 'with appropriate integration',
-            'use': 'for maximum effectiveness',
-            'write': 'with clear structure and organization',
-            'get': 'through effective implementation'
-        }
-        
-        sentence_lower = sentence.lower()
-        for key, value in elaborations.items():
-            if key in sentence_lower:
-                return value
-        
-        return "with comprehensive specifications"
+        if sentence_lower is None:
+            sentence_lower = sentence.lower()
+        return self._elaboration_matcher.match(sentence_lower)
     
-    def apply_style(self, text, style):
-        """Apply style transformations to text."""
-        if style not in self.style_templates:
+    def apply_style(self, text, style, first=True, last=True):
+        """
+        Apply style transformations to text.
+        
+        ``first``/``last`` say whether the text starts/ends the document, so
+        streamed chunks only get the style prefix and closing addition once.
+        """
+        if style not in self._style_rules:
             style = 'professional'
         
-        template = self.style_templates[style]
+        new_prefix, addition = self._style_rules[style]
         
         # Split sentences
-        if NLTK_AVAILABLE:
-            try:
-                sentences = sent_tokenize(text)
-            except:
-                sentences = self._basic_sentence_split(text)
-        else:
-            sentences = self._basic_sentence_split(text)
+        doc = self.analyze(text)
+        sentences = doc.sentences
         
         if not sentences:
-            return text
-        
-        enhanced_text = text
-        first_sent = sentences[0]
-        new_prefix = template['prefixes'][0]
+            return doc.text
         
-        # Remove common weak starters
-        weak_starters = ['Make', 'Build', 'Create', 'Design', 'Develop', 'Add', 'Use', 'Try', 'Write', 'Get']
-        first_sent_lower = first_sent.lower()
-        
-        for starter in weak_starters:
-            if first_sent_lower.startswith(starter.lower()):
-                first_sent = first_sent[len(starter):].lstrip()
-                break
-        
-        enhanced_text = f"{new_prefix} {first_sent}"
-        
-        # Add remaining sentences
-        if len(sentences) > 1:
-            enhanced_text += ' ' + ' '.join(sentences[1:])
+        if not first:
+            enhanced_text = ' '.join(sentences)
+        else:
+            first_sent = sentences[0]
+            
+            # Remove common weak starters
+            starter = self._weak_starter_re.match(doc.sentence_lowers[0])
+            if starter:
+                first_sent = first_sent[starter.end():].lstrip()
+            
+            enhanced_text = f"{new_prefix} {first_sent}"
+            
+            # Add remaining sentences
+            if len(sentences) > 1:
+                enhanced_text += ' ' + ' '.join(sentences[1:])
         
         # Add style-specific addition
-        addition = template['additions'][0]
-        if not enhanced_text.endswith(('.', '!', '?')):
+        if last and not enhanced_text.endswith(('.', '!', '?')):
             enhanced_text += addition + '.'
         
         return enhanced_text
@@ -283,7 +844,8 @@ class PromptEnhancer:
         enhancements = '\n'.join([f"• {v}" for v in boosts.values()])
         return f"{text}\n\nContext Boost Applied:\n{enhancements}"
     
-    def enhance_prompt(self, prompt, style='professional', context_boost=False):
+    def enhance_prompt(self, prompt, style='professional', context_boost=False, timings=False,
+                       lazy=False, keywords=True, profiling=False):
         """
         Main function to enhance a prompt.
         
@@ -291,12 +853,28 @@ class PromptEnhancer:
             prompt (str): The original prompt text
             style (str): Enhancement style - 'professional', 'creative', 'detailed', or 'simplified'
             context_boost (bool): Whether to add context boost
+            timings (bool): Add a 'timings' dict of per-stage seconds to the result
+            lazy (bool): Return an EnhancementResult that extracts keywords and
+                looks up synonyms only when they are first read
+            keywords (bool): When False, skip keywords and synonyms entirely
+                (they are returned empty)
+            profiling (bool): Profile this request with cProfile and tracemalloc
+                and write a report to the profiler's directory; requests are
+                also profiled when PROMPT_ENHANCER_PROFILING samples them
         
         Returns:
             dict: Dictionary containing enhanced prompt and metadata
+            (an EnhancementResult if ``lazy``)
         """
+        if self.profiler.should_profile(profiling):
+            with self.profiler.profile('enhance_prompt', prompt=prompt, style=style,
+                                       context_boost=context_boost):
+                return self._enhance_prompt(prompt, style, context_boost, timings, lazy, keywords)
+        return self._enhance_prompt(prompt, style, context_boost, timings, lazy, keywords)
+    
+    def _enhance_prompt(self, prompt, style, context_boost, timings, lazy, keywords):
         if not prompt or not prompt.strip():
-            return {
+            empty = {
                 'enhanced_prompt': 'Please provide a prompt to enhance.',
                 'keywords': [],
                 'synonyms': {},
@@ -305,32 +883,414 @@ class PromptEnhancer:
                 'original_length': 0,
                 'enhanced_length': 0
             }
+            return EnhancementResult.from_dict(empty) if lazy else empty
+        
+        # In lazy mode the first request kicks off loading; until the
+        # backends are ready every stage falls back to the regex path.
+        if not is_ready():
+            warmup(block=False)
+        
+        start = time.perf_counter()
         
         # Clean and normalize input
         prompt = prompt.strip()
         
+        cache_key = (prompt, style, bool(context_boost))
+        cached = self._cache_get(self.result_cache, 'result', cache_key)
+        if cached is not None:
+            result = self._copy_result(cached)
+            if not keywords:
+                result['keywords'], result['synonyms'] = [], {}
+            self._requests.inc(cache='hit')
+            self._finish_timings(result, {}, start, timings)
+            return EnhancementResult.from_dict(result) if lazy else result
+        self._requests.inc(cache='miss')
+        
+        # Sentences, tokens and lowercase views are computed once and
+        # shared by keyword extraction and sentence expansion.
+        doc = self.analyze(prompt)
+        
+        if lazy or not keywords:
+            stage_times = {}
+            result = self._enhance_deferred(doc, style, context_boost, stage_times, keywords)
+            self._finish_timings(result, stage_times, start, timings)
+            return result if lazy else result.to_dict()
+        
         # Step 1: Extract keywords
-        keywords = self.extract_keywords(prompt)
+        stage_times = {}
+        keywords = self.extract_keywords(doc)
+        stage_times['keywords'] = time.perf_counter() - start
+        
+        result = self._enhance_with_keywords(doc, keywords, style, context_boost, stage_times)
+        self._store_result(cache_key, result)
+        self._finish_timings(result, stage_times, start, timings)
+        return result
+    
+    def enhance_all_styles(self, prompt, context_boost=False, styles=None, timings=False):
+        """
+        Enhance a prompt in every style, sharing the style-independent work.
+        
+        Analysis, keyword extraction, synonym lookup and sentence expansion
+        run once; only styling and refinement run per style. Each result is
+        identical to ``enhance_prompt(prompt, style, context_boost)``.
+        
+        Args:
+            prompt (str): The original prompt text
+            context_boost (bool): Whether to add context boost
+            styles (list): Styles to produce (defaults to every style template)
+            timings (bool): Add a 'timings' dict to each result; shared stage
+                times are repeated in every style's timings
+        
+        Returns:
+            dict: Style name -> result dict, in ``styles`` order
+        """
+        styles = list(styles or self.style_templates)
+        if not prompt or not prompt.strip():
+            return {style: self.enhance_prompt(prompt, style, context_boost) for style in styles}
+        
+        if not is_ready():
+            warmup(block=False)
+        start = time.perf_counter()
+        prompt = prompt.strip()
+        
+        results = {}
+        for style in styles:
+            cached = self._cache_get(self.result_cache, 'result', (prompt, style, bool(context_boost)))
+            if cached is not None:
+                self._requests.inc(cache='hit')
+                results[style] = self._copy_result(cached)
+                self._finish_timings(results[style], {}, start, timings)
+        
+        missing = [style for style in styles if style not in results]
+        if missing:
+            doc = self.analyze(prompt)
+            shared_times = {}
+            keywords = self.extract_keywords(doc)
+            shared_times['keywords'] = time.perf_counter() - start
+            synonyms, expanded = self._shared_stages(doc, keywords, shared_times)
+            shared_seconds = sum(shared_times.values())
+            # Shared stages ran once, so they are recorded once
+            for stage, seconds in shared_times.items():
+                self._stage_seconds.observe(seconds, stage=stage)
+            
+            for style in missing:
+                self._requests.inc(cache='miss')
+                stage_times = {}
+                style_start = time.perf_counter()
+                # Each result gets its own copies of the shared keyword/synonym lists
+                result = self._styled_result(doc, list(keywords),
+                                             {word: list(syns) for word, syns in synonyms.items()},
+                                             expanded, style, context_boost, stage_times)
+                self._store_result((prompt, style, bool(context_boost)), result)
+                # The total covers the shared stages plus this style's own work
+                self._finish_timings(result, stage_times, style_start - shared_seconds, timings)
+                if timings:
+                    result['timings'] = {**shared_times, **stage_times}
+                results[style] = result
+        
+        return {style: results[style] for style in styles}
+    
+    def enhance_incremental(self, prompt, style='professional', context_boost=False, timings=False):
+        """
+        Enhance a prompt that is being edited, recomputing only changed sentences.
+        
+        Each sentence's expansion and keyword candidates are memoized by its
+        text, so after an edit only the sentences that changed are analyzed
+        again and the rest of the pipeline runs on the combined per-sentence
+        results. Output matches ``enhance_prompt`` except that spaCy sees one
+        sentence at a time, which can shift entity and noun-chunk keywords.
+        
+        Args:
+            prompt (str): The current prompt text
+            style (str): Enhancement style
+            context_boost (bool): Whether to add context boost
+            timings (bool): Add per-stage 'timings' and a 'sentences' dict
+                with the total and recomputed sentence counts
+        
+        Returns:
+            dict: Dictionary containing enhanced prompt and metadata
+        """
+        if not prompt or not prompt.strip():
+            return self.enhance_prompt(prompt, style, context_boost)
+        
+        if not is_ready():
+            warmup(block=False)
+        start = time.perf_counter()
+        clock = time.perf_counter
+        doc = self.analyze(prompt.strip())
+        
+        entries, recomputed = self._sentence_entries(doc)
+        self._incremental_sentences.inc(recomputed, state='recomputed')
+        self._incremental_sentences.inc(len(entries) - recomputed, state='reused')
+        t0 = clock()
+        stage_times = {'sentences': t0 - start}
+        
+        # Whole-text keywords list entities, then nouns, then noun chunks,
+        # so the per-sentence candidates are merged group by group.
+        # Statistical scores depend on the whole text, so they are not split.
+        keywords = []
+        if self.keyword_backend == 'statistical':
+            keywords = self.extract_keywords(doc)
+        elif any(entry[2] for entry in entries):
+            keywords = self._deduplicate_keywords(
+                [kw for group in range(3) for entry in entries if entry[2] for kw in entry[2][group]]
+            )
+        if not keywords:
+            keywords = self._deduplicate_keywords([kw for entry in entries for kw in entry[1]])
+        t1 = clock()
+        stage_times['keywords'] = t1 - t0
+        
+        synonyms = self._keyword_synonyms(keywords)
+        t2 = clock()
+        stage_times['synonyms'] = t2 - t1
+        
+        expanded = ' '.join(entry[0] for entry in entries)
+        stage_times['expand'] = clock() - t2
+        
+        result = self._styled_result(doc, keywords, synonyms, expanded, style, context_boost,
+                                     stage_times)
+        self._finish_timings(result, stage_times, start, timings)
+        if timings:
+            result['sentences'] = {'total': len(entries), 'recomputed': recomputed}
+        return result
+    
+    def _sentence_entries(self, doc):
+        """
+        Return memoized per-sentence analysis for every sentence of ``doc``.
+        
+        Returns:
+            tuple: (entries, recomputed) where each entry is (expanded sentence,
+            regex keyword candidates, spaCy (entities, nouns, chunks) or None)
+        """
+        entries = [self.sentence_cache.get(sent) for sent in doc.sentences]
+        todo = [i for i, entry in enumerate(entries) if entry is None]
+        if not todo:
+            return entries, 0
+        
+        parsed = None
+        pipeline = self._keyword_pipeline()
+        if pipeline is not None:
+            try:
+                parsed = list(pipeline.pipe(doc.sentences[i] for i in todo))
+            except:
+                parsed = None
+        
+        stop_words = self.stop_words
+        ready = is_ready()
+        for n, i in enumerate(todo):
+            sent, words = doc.sentences[i], doc.sentence_tokens[i]
+            if len(words) < 8:
+                expanded = f"{sent.strip()} {self._get_elaboration(sent, doc.sentence_lowers[i])}."
+            else:
+                expanded = sent.strip()
+            basic = [word for word in words if len(word) > 3 and word not in stop_words]
+            candidates = self._keyword_candidates(parsed[n]) if parsed else None
+            entries[i] = (expanded, basic, candidates)
+            # Fallback results from before warm-up finished are not cached
+            if ready:
+                self.sentence_cache.set(sent, entries[i])
+        return entries, len(todo)
+    
+    async def enhance_prompt_async(self, prompt, style='professional', context_boost=False,
+                                   executor=None, keywords=True):
+        """
+        Enhance a prompt without blocking the event loop.
+        
+        The pipeline runs on ``executor`` (the loop's default thread pool if
+        None). Concurrent calls with the same prompt, style and context boost
+        share one in-flight computation instead of each paying for it.
+        
+        Args:
+            prompt (str): The original prompt text
+            style (str): Enhancement style
+            context_boost (bool): Whether to add context boost
+            executor (Executor): Thread pool to run the pipeline on
+            keywords (bool): When False, skip keywords and synonyms entirely
+        
+        Returns:
+            dict: Same result as enhance_prompt()
+        """
+        request_key = ((prompt or '').strip(), style, bool(context_boost))
+        
+        # Cached results are cheap enough to serve on the loop itself
+        if request_key in self.result_cache:
+            return self.enhance_prompt(prompt, style, context_boost, keywords=keywords)
+        
+        loop = asyncio.get_running_loop()
+        key = (loop, request_key + (bool(keywords),))
+        future = self._inflight.get(key)
+        if future is None:
+            future = loop.run_in_executor(executor, self.enhance_prompt, prompt, style, context_boost,
+                                          False, False, keywords)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._coalesced.inc()
+        
+        # Shield the shared computation so one cancelled caller does not
+        # cancel it for everyone else waiting on it.
+        result = await asyncio.shield(future)
+        return self._copy_result(result)
+    
+    def enhance_prompts(self, prompts, style='professional', context_boost=False,
+                        batch_size=64, n_process=1):
+        """
+        Enhance many prompts, sharing the NLP work across the whole batch.
+        
+        Keyword extraction runs through spaCy's ``nlp.pipe`` instead of one
+        pipeline call per prompt, and synonym lookups are memoized for the
+        lifetime of the enhancer through its caches.
+        
+        Args:
+            prompts (iterable): Items to enhance. Each item is a prompt string,
+                a dict with 'prompt' and optional 'style'/'context_boost' keys,
+                or a (prompt, style, context_boost) tuple.
+            style (str): Default style for items that do not set one
+            context_boost (bool): Default context boost for items that do not set one
+            batch_size (int): Number of texts spaCy processes per batch
+            n_process (int): Number of spaCy worker processes
+        
+        Yields:
+            dict: One result per input item, in input order, with the same
+            keys as enhance_prompt()
+        
+        Raises:
+            TypeError: If an item's prompt is not a string
+        """
+        if not is_ready():
+            warmup(block=False)
+        
+        items = (self._normalize_batch_item(item, style, context_boost) for item in prompts)
+        
+        pipeline = self._keyword_pipeline()
+        if pipeline is None:
+            for prompt, item_style, item_boost in items:
+                yield self.enhance_prompt(prompt, item_style, item_boost)
+            return
+        
+        def to_pipe():
+            # Empty prompts and cached results skip spaCy with an empty text
+            for prompt, item_style, item_boost in items:
+                cache_key = (prompt, item_style, item_boost)
+                cached = self._cache_get(self.result_cache, 'result', cache_key) if prompt else None
+                text = prompt if prompt and cached is None else ''
+                yield text, (prompt, cache_key, cached)
+        
+        docs = pipeline.pipe(to_pipe(), as_tuples=True, batch_size=batch_size, n_process=n_process)
+        for doc, (prompt, cache_key, cached) in docs:
+            _, item_style, item_boost = cache_key
+            if cached is not None:
+                self._requests.inc(cache='hit')
+                yield self._copy_result(cached)
+                continue
+            if not prompt:
+                yield self.enhance_prompt(prompt, item_style, item_boost)
+                continue
+            self._requests.inc(cache='miss')
+            start = time.perf_counter()
+            analysis = self.analyze(prompt)
+            keywords = self._cache_get(self.keyword_cache, 'keywords', prompt)
+            if keywords is None:
+                keywords = self._keywords_from_doc(doc) or self._extract_keywords_basic(analysis)
+                self._cache_set(self.keyword_cache, 'keywords', prompt, keywords)
+            stage_times = {'keywords': time.perf_counter() - start}
+            result = self._enhance_with_keywords(analysis, list(keywords), item_style, item_boost,
+                                                 stage_times)
+            self._store_result(cache_key, result)
+            self._finish_timings(result, stage_times, start, False)
+            yield result
+    
+    @staticmethod
+    def _normalize_batch_item(item, style, context_boost):
+        """Turn a batch item into a (stripped prompt, style, context_boost) tuple."""
+        if isinstance(item, dict):
+            prompt = item.get('prompt', '')
+            style = item.get('style') or style
+            context_boost = item.get('context_boost', context_boost)
+        elif isinstance(item, (tuple, list)):
+            prompt = item[0]
+            if len(item) > 1 and item[1]:
+                style = item[1]
+            if len(item) > 2:
+                context_boost = item[2]
+        else:
+            prompt = item
+        if prompt is not None and not isinstance(prompt, str):
+            raise TypeError(f"Batch prompts must be strings, got {type(prompt).__name__}")
+        return (prompt or '').strip(), style, bool(context_boost)
+    
+    def _enhance_with_keywords(self, doc, keywords, style, context_boost, stage_times=None):
+        """Run the enhancement steps that follow keyword extraction."""
+        if stage_times is None:
+            stage_times = {}
+        synonyms, expanded = self._shared_stages(doc, keywords, stage_times)
+        return self._styled_result(doc, keywords, synonyms, expanded, style, context_boost,
+                                   stage_times)
+    
+    def _shared_stages(self, doc, keywords, stage_times):
+        """Run the stages that do not depend on style; returns (synonyms, expanded)."""
+        clock = time.perf_counter
         
         # Step 2: Get synonyms
+        t0 = clock()
+        synonyms = self._keyword_synonyms(keywords)
+        t1 = clock()
+        stage_times['synonyms'] = t1 - t0
+        
+        # Step 3: Expand vague sentences
+        expanded = self.expand_vague_sentences(doc)
+        stage_times['expand'] = clock() - t1
+        return synonyms, expanded
+    
+    def _enhance_deferred(self, doc, style, context_boost, stage_times, keywords=True):
+        """
+        Run every stage except keywords and synonyms.
+        
+        Returns:
+            EnhancementResult: Computes keywords and synonyms on first access,
+            or has them empty when ``keywords`` is False
+        """
+        t0 = time.perf_counter()
+        expanded = self.expand_vague_sentences(doc)
+        stage_times['expand'] = time.perf_counter() - t0
+        result = self._styled_result(doc, [], {}, expanded, style, context_boost, stage_times)
+        if not keywords:
+            return EnhancementResult.from_dict(result)
+        return EnhancementResult.from_dict(
+            result, keywords=None, synonyms=None,
+            keyword_source=lambda: self.extract_keywords(doc),
+            synonym_source=self._keyword_synonyms,
+        )
+    
+    def _keyword_synonyms(self, keywords):
+        """Look up synonyms for the top five keywords, skipping words without any."""
         synonyms = {}
         for keyword in keywords[:5]:
             syns = self.get_synonyms(keyword)
             if syns:
                 synonyms[keyword] = syns
-        
-        # Step 3: Expand vague sentences
-        expanded = self.expand_vague_sentences(prompt)
+        return synonyms
+    
+    def _styled_result(self, doc, keywords, synonyms, expanded, style, context_boost, stage_times):
+        """Run the style-dependent stages on an expanded prompt and build the result."""
+        clock = time.perf_counter
+        t2 = clock()
         
         # Step 4: Apply style
         enhanced = self.apply_style(expanded, style)
+        t3 = clock()
+        stage_times['style'] = t3 - t2
         
         # Step 5: Add context boost if requested
         if context_boost:
             enhanced = self.add_context_boost(enhanced, include_context=True)
+            t4 = clock()
+            stage_times['context_boost'] = t4 - t3
+            t3 = t4
         
         # Step 6: Refine for style
         enhanced = self._refine_for_style(enhanced, style)
+        stage_times['refine'] = clock() - t3
         
         return {
             'enhanced_prompt': enhanced,
@@ -338,39 +1298,231 @@ class PromptEnhancer:
             'synonyms': synonyms,
             'style': style,
             'context_boost_applied': context_boost,
-            'original_length': len(prompt.split()),
+            'original_length': doc.word_count,
             'enhanced_length': len(enhanced.split())
         }
     
-    def _refine_for_style(self, text, style):
+    def _finish_timings(self, result, stage_times, start, include):
+        """Record stage timings in the metrics registry, optionally adding them to the result."""
+        stage_times['total'] = time.perf_counter() - start
+        for stage, seconds in stage_times.items():
+            self._stage_seconds.observe(seconds, stage=stage)
+        if include:
+            result['timings'] = stage_times
+    
+    def enhance_stream(self, source, style='professional', context_boost=False, chunk_size=10000):
+        """
+        Enhance a large document incrementally, chunk by chunk.
+        
+        Input is cut into chunks of roughly ``chunk_size`` characters on
+        sentence boundaries, and each chunk runs through the pipeline on its
+        own, so memory stays flat and spaCy never sees more than one chunk.
+        The style prefix is applied to the first chunk and the context boost
+        and closing refinements to the last one; checks that look at the
+        whole text (such as "already mentions ensure") see one chunk at a time.
+        
+        Args:
+            source (str or file): Text, or a file-like object opened in text mode
+            style (str): Enhancement style
+            context_boost (bool): Whether to add context boost after the last chunk
+            chunk_size (int): Target characters per chunk
+        
+        Yields:
+            dict: One part per chunk with 'chunk', 'enhanced_text' (join all
+            parts with '' to get the document) and 'keywords' aggregated over
+            the chunks so far. The last part has 'done': True plus the
+            'synonyms', 'style', 'context_boost_applied', 'original_length'
+            and 'enhanced_length' of the whole document.
+        """
+        if not is_ready():
+            warmup(block=False)
+        
+        counts = {}
+        first_seen = {}
+        original_length = enhanced_length = 0
+        
+        chunks = self._iter_sentence_chunks(source, chunk_size)
+        current = next(chunks, None)
+        if current is None:
+            result = self.enhance_prompt('', style, context_boost)
+            result.update({'chunk': 0, 'enhanced_text': result['enhanced_prompt'], 'done': True})
+            yield result
+            return
+        
+        index = 0
+        while current is not None:
+            following = next(chunks, None)
+            first, last = index == 0, following is None
+            
+            doc = self.analyze(current.strip())
+            original_length += doc.word_count
+            for keyword in self._extract_keywords_uncached(doc):
+                counts[keyword] = counts.get(keyword, 0) + 1
+                first_seen.setdefault(keyword, len(first_seen))
+            if len(counts) > 5000:
+                # Keep keyword bookkeeping bounded on very large inputs
+                keep = set(heapq.nlargest(1000, counts, key=lambda k: (counts[k], -first_seen[k])))
+                counts = {k: v for k, v in counts.items() if k in keep}
+                first_seen = {k: v for k, v in first_seen.items() if k in keep}
+            
+            enhanced = self.expand_vague_sentences(doc)
+            enhanced = self.apply_style(enhanced, style, first=first, last=last)
+            if last and context_boost:
+                enhanced = self.add_context_boost(enhanced, include_context=True)
+            enhanced = self._refine_for_style(enhanced, style, last=last)
+            enhanced_length += len(enhanced.split())
+            
+            keywords = heapq.nlargest(10, counts, key=lambda k: (counts[k], -first_seen[k]))
+            part = {
+                'chunk': index,
+                'enhanced_text': enhanced if first else ' ' + enhanced,
+                'keywords': keywords,
+                'done': last,
+            }
+            if last:
+                part.update({
+                    'synonyms': self._keyword_synonyms(keywords),
+                    'style': style,
+                    'context_boost_applied': context_boost,
+                    'original_length': original_length,
+                    'enhanced_length': enhanced_length,
+                })
+            yield part
+            
+            current = following
+            index += 1
+    
+    @staticmethod
+    def _iter_sentence_chunks(source, chunk_size):
+        """Yield chunks of about ``chunk_size`` characters ending on sentence boundaries."""
+        read = source.read if hasattr(source, 'read') else io.StringIO(source).read
+        buffer = ''
+        while True:
+            block = read(chunk_size)
+            buffer += block
+            if not block:
+                if buffer.strip():
+                    yield buffer
+                return
+            if len(buffer) < chunk_size:
+                continue
+            
+            cut = 0
+            for boundary in _CHUNK_BOUNDARY_RE.finditer(buffer):
+                cut = boundary.end()
+            if not cut:
+                # No sentence boundary yet; give up waiting for one eventually
+                if len(buffer) < 4 * chunk_size:
+                    continue
+                cut = buffer.rfind(' ') + 1 or len(buffer)
+            if buffer[:cut].strip():
+                yield buffer[:cut]
+            buffer = buffer[cut:]
+    
+    def _pipeline_signature(self):
+        """Identify everything that affects output, for persistent cache keys."""
+        if self._keyword_pipeline() is not None:
+            keyword_source = 'spacy'
+        else:
+            keyword_source = 'statistical' if self.keyword_backend == 'statistical' else 'regex'
+        return '/'.join([
+            str(PIPELINE_VERSION),
+            self.profile,
+            keyword_source,
+            'nltk' if NLTK_AVAILABLE else 'basic',
+            'index' if get_default_index() is not None else 'wordnet',
+        ])
+    
+    def _cache_get(self, memory, kind, key):
+        """Look a value up in the memory cache, then the persistent cache."""
+        value = memory.get(key)
+        if value is None and self.persistent_cache is not None and is_ready():
+            if isinstance(key, tuple):
+                key = list(key)
+            value = self.persistent_cache.get(kind, self._pipeline_signature(), key)
+            if value is not None:
+                memory.set(tuple(key) if isinstance(key, list) else key, value)
+        return value
+    
+    def _cache_set(self, memory, kind, key, value):
+        """Store a value in every cache once the NLP backends are ready."""
+        # Fallback results from before warm-up finished are not cached
+        if not is_ready():
+            return
+        memory.set(key, value)
+        if self.persistent_cache is not None:
+            self.persistent_cache.set(kind, self._pipeline_signature(),
+                                      list(key) if isinstance(key, tuple) else key, value)
+    
+    def _store_result(self, cache_key, result):
+        """Cache a result once the NLP backends are ready."""
+        self._cache_set(self.result_cache, 'result', cache_key, self._copy_result(result))
+    
+    @staticmethod
+    def _copy_result(result):
+        """Copy a result so callers cannot mutate cached lists and dicts."""
+        copied = dict(result)
+        copied['keywords'] = list(result['keywords'])
+        copied['synonyms'] = {word: list(syns) for word, syns in result['synonyms'].items()}
+        return copied
+    
+    def cache_stats(self):
+        """Return hit/miss/eviction statistics for every cache."""
+        stats = {
+            'results': self.result_cache.stats(),
+            'keywords': self.keyword_cache.stats(),
+            'synonyms': self.synonym_cache.stats(),
+            'sentences': self.sentence_cache.stats(),
+        }
+        if self.persistent_cache is not None:
+            stats['persistent'] = self.persistent_cache.stats()
+        return stats
+    
+    def clear_caches(self):
+        """Empty every cache and reset its statistics."""
+        self.result_cache.clear()
+        self.keyword_cache.clear()
+        self.synonym_cache.clear()
+        self.sentence_cache.clear()
+        if self.persistent_cache is not None:
+            self.persistent_cache.clear()
+    
+    def _refine_for_style(self, text, style, last=True):
         """Apply final refinements based on style."""
-        template = self.style_templates.get(style, self.style_templates['professional'])
+        doc = self.analyze(text)
+        text = doc.text
         
         # Add style-specific tone
-        if style == 'professional' and 'ensure' not in text.lower():
+        if style == 'professional' and 'ensure' not in doc.lower:
             text = text.replace('.', ', ensuring quality and efficiency.')
-        elif style == 'creative' and 'innovative' not in text.lower():
-            sentences = self._basic_sentence_split(text)
+        elif not last and style in ('creative', 'detailed'):
+            # These refinements only touch the end of the document
+            pass
+        elif style == 'creative' and 'innovative' not in doc.lower:
+            sentences = doc.basic_sentences
             if sentences:
                 last_sent = sentences[-1]
                 replacement = f"{last_sent.rstrip('.')}, creating an engaging and memorable experience."
-                text = text.replace(last_sent, replacement)
-        elif style == 'detailed' and 'comprehensive' not in text.lower():
+                # Rewrite only the final occurrence of the last sentence
+                head, _, tail = text.rpartition(last_sent)
+                text = head + replacement + tail
+        elif style == 'detailed' and 'comprehensive' not in doc.lower:
             if not text.endswith('.'):
                 text = text + '.'
             text = text + ' Ensure comprehensive coverage of all aspects and components.'
         elif style == 'simplified':
             # Remove unnecessary adjectives
-            text = re.sub(r'\b(very|extremely|highly|significantly)\s+', '', text, flags=re.IGNORECASE)
+            text = self._filler_re.sub('', text)
         
         return text
 
 
 # Global instance
-enhancer = PromptEnhancer()
+enhancer = PromptEnhancer(persistent_cache=CACHE_DB)
 
 
-def enhance_prompt(prompt, style='professional', context_boost=False):
+def enhance_prompt(prompt, style='professional', context_boost=False, timings=False,
+                   lazy=False, keywords=True, profiling=False):
     """
     Public API for prompt enhancement.
     
@@ -378,11 +1530,105 @@ def enhance_prompt(prompt, style='professional', context_boost=False):
         prompt (str): The prompt to enhance
         style (str): 'professional', 'creative', 'detailed', or 'simplified'
         context_boost (bool): Add context boost if True
+        timings (bool): Include per-stage timings in seconds if True
+        lazy (bool): Return an EnhancementResult that computes keywords and
+            synonyms only when they are read
+        keywords (bool): Skip keywords and synonyms entirely if False
+        profiling (bool): Write a cProfile/tracemalloc report for this request
+    
+    Returns:
+        dict: Enhanced prompt with metadata (an EnhancementResult if ``lazy``)
+    """
+    return enhancer.enhance_prompt(prompt, style, context_boost, timings, lazy, keywords, profiling)
+
+
+async def enhance_prompt_async(prompt, style='professional', context_boost=False, executor=None,
+                               keywords=True):
+    """
+    Public async API for prompt enhancement.
+    
+    Args:
+        prompt (str): The prompt to enhance
+        style (str): 'professional', 'creative', 'detailed', or 'simplified'
+        context_boost (bool): Add context boost if True
+        executor (Executor): Thread pool to run on (defaults to the loop's)
+        keywords (bool): Skip keywords and synonyms entirely if False
     
     Returns:
         dict: Enhanced prompt with metadata
     """
-    return enhancer.enhance_prompt(prompt, style, context_boost)
+    return await enhancer.enhance_prompt_async(prompt, style, context_boost, executor, keywords)
+
+
+def cache_stats():
+    """Return cache statistics for the global enhancer."""
+    return enhancer.cache_stats()
+
+
+def enhance_incremental(prompt, style='professional', context_boost=False, timings=False):
+    """
+    Public API for re-enhancing a prompt as it is edited.
+    
+    Args:
+        prompt (str): The current prompt text
+        style (str): 'professional', 'creative', 'detailed', or 'simplified'
+        context_boost (bool): Add context boost if True
+        timings (bool): Include per-stage timings and sentence reuse counts if True
+    
+    Returns:
+        dict: Enhanced prompt with metadata
+    """
+    return enhancer.enhance_incremental(prompt, style, context_boost, timings)
+
+
+def enhance_all_styles(prompt, context_boost=False, styles=None, timings=False):
+    """
+    Public API for enhancing a prompt in every style at once.
+    
+    Args:
+        prompt (str): The prompt to enhance
+        context_boost (bool): Add context boost if True
+        styles (list): Styles to produce (defaults to all four)
+        timings (bool): Include per-stage timings in seconds if True
+    
+    Returns:
+        dict: Style name -> enhanced prompt with metadata
+    """
+    return enhancer.enhance_all_styles(prompt, context_boost, styles, timings)
+
+
+def enhance_stream(text_or_file, style='professional', context_boost=False, chunk_size=10000):
+    """
+    Public API for incremental enhancement of very large documents.
+    
+    Args:
+        text_or_file (str or file): Text, or a file-like object opened in text mode
+        style (str): 'professional', 'creative', 'detailed', or 'simplified'
+        context_boost (bool): Add context boost after the last chunk if True
+        chunk_size (int): Target characters per chunk
+    
+    Yields:
+        dict: Enhanced text per chunk; the last part carries the document metadata
+    """
+    return enhancer.enhance_stream(text_or_file, style, context_boost, chunk_size)
+
+
+def enhance_prompts(prompts, style='professional', context_boost=False, batch_size=64, n_process=1):
+    """
+    Public API for batch prompt enhancement.
+    
+    Args:
+        prompts (iterable): Prompt strings, dicts with 'prompt'/'style'/'context_boost'
+            keys, or (prompt, style, context_boost) tuples
+        style (str): Default style for items that do not set one
+        context_boost (bool): Default context boost for items that do not set one
+        batch_size (int): Number of texts spaCy processes per batch
+        n_process (int): Number of spaCy worker processes
+    
+    Yields:
+        dict: Enhanced prompt with metadata, one per input item in order
+    """
+    return enhancer.enhance_prompts(prompts, style, context_boost, batch_size, n_process)
 
 
 if __name__ == '__main__':
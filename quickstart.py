@@ -53,6 +53,12 @@ def main():
         print("⚠️  spaCy model download failed, but continuing...")
     print("✅ spaCy model ready")
     
+    # Step 3b: Vendor NLTK data so the app never downloads at runtime
+    print("\n📍 Step 3b: Installing NLTK data...")
+    if not run_command(f"{sys.executable} nltk_resources.py vendor",
+                       "Downloading NLTK resources (first time only)"):
+        print("⚠️  NLTK data download failed, but continuing...")
+    
     # Step 4: Start the app
     print("\n📍 Step 4: Starting Streamlit app...\n")
     print("="*60)
@@ -40,6 +40,10 @@ echo.
 echo Installing spaCy model...
 python -m spacy download en_core_web_sm
 
+echo.
+echo Installing NLTK data...
+python nltk_resources.py vendor
+
 echo.
 echo =====================================================
 echo  Starting AI Prompt Enhancer...
@@ -0,0 +1,234 @@
+"""
+Statistical Keywords - RAKE/YAKE-style keyword extraction in pure Python
+
+A middle ground between the regex fallback (every long non-stopword token,
+in order of appearance) and spaCy (full tagging and parsing, truncated to
+ten keywords). Candidates are the runs of content words between stopwords
+and punctuation, as in RAKE. Each word is scored by its co-occurrence
+degree (how many candidate words it appears alongside, counting repeats),
+weighted by position as in YAKE so words from the first sentences rank
+higher. Phrases score the sum of their words.
+
+Select it with ``PromptEnhancer(keyword_backend='statistical')`` or
+PROMPT_ENHANCER_KEYWORDS=statistical.
+
+Compare keyword quality and speed against the other backends:
+    python statistical_keywords.py compare
+    python statistical_keywords.py compare --reference benchmarks/keyword_heldout.jsonl
+
+benchmarks/keyword_heldout.jsonl was labelled separately from the default
+reference corpus and is never used to tune the stoplist or the scorer.
+
+Quality is word-level F1 against hand-labelled keywords, plus agreement
+with spaCy's keywords when spaCy is installed.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+
+DEFAULT_REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'benchmarks', 'keyword_reference.jsonl')
+
+# Function words, plus two small groups of words that are never keywords:
+# the request verbs the enhancer itself treats as weak sentence starters
+# (PromptEnhancer.WEAK_STARTERS, with inflections) and placeholder nouns.
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each either else
+etc even ever every few for from further had has have having he her here hers herself him
+himself his how however i if in into is it its itself just least less let like ll may me
+might more most much must my myself need needs no nor not now of off often on once only or
+other our ours ourselves out over own per please rather re really same shall she should so
+some such than that the their theirs them themselves then there these they this those
+through thus to too under until up upon us use used using ve very via was we well were
+what when where whether which while who whom whose why will with within without would yet
+you your yours yourself yourselves want wants
+make makes making build builds building create creates creating design designs designing
+develop develops developing add adds adding try tries trying write writes writing get gets
+getting
+thing things something stuff
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*|[^\sa-z0-9]")
+MAX_PHRASE_WORDS = 3
+
+
+def _is_content(token, stop_words):
+    return (len(token) > 2 and token[0].isalnum() and not token.isdigit()
+            and token not in stop_words)
+
+
+def candidate_phrases(sentences, stop_words=STOP_WORDS, max_words=MAX_PHRASE_WORDS):
+    """
+    Split lowercase sentences into candidate phrases.
+
+    Yields:
+        tuple: (words, sentence index) for every run of content words,
+        with runs longer than ``max_words`` cut into consecutive pieces
+    """
+    for index, sentence in enumerate(sentences):
+        run = []
+        for token in _TOKEN_RE.findall(sentence):
+            if _is_content(token, stop_words):
+                run.append(token)
+                continue
+            for start in range(0, len(run), max_words):
+                yield tuple(run[start:start + max_words]), index
+            run = []
+        for start in range(0, len(run), max_words):
+            yield tuple(run[start:start + max_words]), index
+
+
+def _position_weight(sentence_index):
+    """1.0 for the first sentence, decaying logarithmically after it."""
+    return math.log2(3) / math.log2(3 + sentence_index)
+
+
+def score_candidates(sentences, stop_words=STOP_WORDS, max_words=MAX_PHRASE_WORDS):
+    """
+    Score every candidate word and phrase.
+
+    Returns:
+        list: (keyword, score, first position) tuples, best first
+    """
+    degree = {}
+    positions = {}
+    phrases = {}
+    for order, (words, index) in enumerate(candidate_phrases(sentences, stop_words, max_words)):
+        for word in words:
+            degree[word] = degree.get(word, 0) + len(words)
+            positions.setdefault(word, []).append(index)
+        phrases.setdefault(words, order)
+
+    word_scores = {
+        word: degree[word] * _position_weight(statistics.median_low(positions[word]))
+        for word in degree
+    }
+
+    scored = {}
+    for words, order in phrases.items():
+        for word in words:
+            if word not in scored:
+                scored[word] = (word_scores[word], order)
+        if len(words) > 1:
+            scored[' '.join(words)] = (sum(word_scores[word] for word in words), order)
+    return sorted(((keyword, score, order) for keyword, (score, order) in scored.items()),
+                  key=lambda item: (-item[1], item[2]))
+
+
+def extract_keywords(sentences, stop_words=STOP_WORDS, max_keywords=10):
+    """
+    Return the top keywords and key phrases of some text.
+
+    Args:
+        sentences (list): Lowercase sentences (a plain string is one sentence)
+        stop_words (iterable): Words that never start or continue a phrase
+        max_keywords (int): Number of keywords to return
+    """
+    if isinstance(sentences, str):
+        sentences = [sentences.lower()]
+    return [keyword for keyword, _, _ in score_candidates(sentences, stop_words)[:max_keywords]]
+
+
+def _keyword_words(keywords):
+    return {word for keyword in keywords for word in keyword.split()}
+
+
+def f1_score(predicted, reference):
+    """Word-level precision, recall and F1 of keyword lists."""
+    predicted, reference = _keyword_words(predicted), _keyword_words(reference)
+    overlap = len(predicted & reference)
+    precision = overlap / len(predicted) if predicted else 0.0
+    recall = overlap / len(reference) if reference else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def load_reference(path=DEFAULT_REFERENCE):
+    """Read (prompt, keywords) pairs from a JSONL reference corpus."""
+    with open(path, encoding='utf-8') as handle:
+        return [(record['prompt'], record['keywords'])
+                for record in map(json.loads, handle) if record]
+
+
+def compare(reference, repeat=20):
+    """
+    Score each keyword backend against a labelled reference corpus.
+
+    Returns:
+        dict: backend -> precision/recall/F1 against the labels, F1 against
+        spaCy (if installed) and mean microseconds per prompt
+    """
+    import prompt_enhancer
+
+    prompt_enhancer.warmup()
+    enhancers = {
+        backend: prompt_enhancer.PromptEnhancer(cache_size=0, profile='accurate',
+                                                keyword_backend=backend)
+        for backend in prompt_enhancer.KEYWORD_BACKENDS
+    }
+    if prompt_enhancer.get_pipeline('accurate') is None:
+        del enhancers['spacy']
+
+    outputs = {
+        backend: [enhancer.extract_keywords(prompt) for prompt, _ in reference]
+        for backend, enhancer in enhancers.items()
+    }
+    report = {}
+    for backend, enhancer in enhancers.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for prompt, _ in reference:
+                enhancer._extract_keywords_uncached(enhancer.analyze(prompt))
+        elapsed = time.perf_counter() - start
+
+        scores = [f1_score(predicted, gold)
+                  for predicted, (_, gold) in zip(outputs[backend], reference)]
+        row = {
+            'precision': statistics.fmean(s[0] for s in scores),
+            'recall': statistics.fmean(s[1] for s in scores),
+            'f1': statistics.fmean(s[2] for s in scores),
+            'us_per_prompt': elapsed / (repeat * len(reference)) * 1e6,
+        }
+        if 'spacy' in outputs:
+            row['spacy_f1'] = statistics.fmean(
+                f1_score(predicted, spacy)[2]
+                for predicted, spacy in zip(outputs[backend], outputs['spacy'])
+            )
+        report[backend] = row
+    return report
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Statistical keyword extraction.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    extract = sub.add_parser('extract', help='Print the keywords of some text')
+    extract.add_argument('text')
+    quality = sub.add_parser('compare', help='Compare keyword backends on a reference corpus')
+    quality.add_argument('--reference', default=DEFAULT_REFERENCE, help='Labelled JSONL corpus')
+    quality.add_argument('--repeat', type=int, default=20, help='Timing passes over the corpus')
+    args = parser.parse_args(argv)
+
+    if args.command == 'extract':
+        from prompt_enhancer import PromptEnhancer
+        print(', '.join(PromptEnhancer(keyword_backend='statistical').extract_keywords(args.text)))
+        return 0
+
+    report = compare(load_reference(args.reference), args.repeat)
+    print(f"{'backend':12} {'precision':>9} {'recall':>7} {'f1':>6} {'spacy f1':>9} {'us/prompt':>10}")
+    for backend, row in report.items():
+        spacy_f1 = f"{row['spacy_f1']:9.3f}" if 'spacy_f1' in row else f"{'n/a':>9}"
+        print(f"{backend:12} {row['precision']:9.3f} {row['recall']:7.3f} {row['f1']:6.3f} "
+              f"{spacy_f1} {row['us_per_prompt']:10.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
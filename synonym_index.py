@@ -0,0 +1,270 @@
+"""
+Synonym Index - Precompiled, memory-mapped WordNet synonym table
+
+Walking ``wordnet.synsets(word)`` and every lemma on each request is slow,
+and WordNet's lazy corpus loading adds seconds to the first call. This
+module compiles WordNet once into a compact binary file that is mmapped at
+runtime, so a lookup is a binary search over sorted keys with near-zero
+resident memory. Worker processes that open the same file share its pages
+through the OS page cache.
+
+Build the index (needs NLTK + WordNet, run once at build/deploy time):
+    python synonym_index.py build
+    python synonym_index.py build --output /path/to/wordnet_synonyms.idx
+
+File layout (all integers little-endian uint32):
+    header        magic, format version, key count
+    key_offsets   n + 1 offsets into the key blob
+    val_offsets   n + 1 offsets into the value blob
+    key_blob      sorted UTF-8 keys, concatenated
+    val_blob      synonyms per key, UTF-8, separated by \\x1f
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+
+MAGIC = b'SYNIDX\x00\x01'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sII')
+OFFSET = struct.Struct('<I')
+SEPARATOR = '\x1f'
+MAX_SYNONYMS = 5
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    'PROMPT_ENHANCER_SYNONYM_INDEX',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'wordnet_synonyms.idx')
+)
+
+# Suffix rules mirroring WordNet's morphy, used to find the base form of
+# inflected words ("websites" -> "website", "building" -> "build").
+_DETACHMENTS = [
+    ('s', ''), ('ses', 's'), ('xes', 'x'), ('zes', 'z'), ('ches', 'ch'),
+    ('shes', 'sh'), ('men', 'man'), ('ies', 'y'), ('es', 'e'), ('es', ''),
+    ('ed', 'e'), ('ed', ''), ('ing', 'e'), ('ing', ''), ('er', ''),
+    ('est', ''), ('er', 'e'), ('est', 'e'),
+]
+
+
+def normalize_key(word):
+    """Normalize a word or phrase to its index key form."""
+    return word.replace('_', ' ').strip().lower()
+
+
+def base_forms(word):
+    """Return the word followed by its candidate morphological base forms."""
+    forms = [word]
+    for suffix, replacement in _DETACHMENTS:
+        if word.endswith(suffix) and len(word) > len(suffix) + 1:
+            form = word[:-len(suffix)] + replacement
+            if form not in forms:
+                forms.append(form)
+    return forms
+
+
+def write_index(entries, path):
+    """
+    Write a synonym index file.
+
+    Args:
+        entries (iterable): (word, synonyms) pairs; later duplicates are ignored
+        path (str): Destination file, replaced atomically
+
+    Returns:
+        int: Number of keys written
+    """
+    table = {}
+    for word, synonyms in entries:
+        key = normalize_key(word)
+        if key and key not in table and synonyms:
+            table[key] = [s for s in synonyms if SEPARATOR not in s]
+
+    # Sort on encoded bytes so the on-disk order matches byte comparison
+    encoded = sorted((key.encode('utf-8'), key) for key in table)
+    key_offsets, val_offsets = [0], [0]
+    key_blob, val_blob = bytearray(), bytearray()
+    for raw_key, key in encoded:
+        key_blob += raw_key
+        key_offsets.append(len(key_blob))
+        val_blob += SEPARATOR.join(table[key]).encode('utf-8')
+        val_offsets.append(len(val_blob))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        handle.write(struct.pack(f'<{len(key_offsets)}I', *key_offsets))
+        handle.write(struct.pack(f'<{len(val_offsets)}I', *val_offsets))
+        handle.write(key_blob)
+        handle.write(val_blob)
+    os.replace(tmp_path, path)
+    return len(encoded)
+
+
+def iter_wordnet_synonyms(max_synonyms=MAX_SYNONYMS):
+    """
+    Yield (lemma, synonyms) for every WordNet lemma name.
+
+    Synonyms follow the same rules as PromptEnhancer.get_synonyms (other
+    lemma names longer than two characters), ordered by WordNet sense
+    frequency instead of arbitrary set order.
+    """
+    import nltk
+    from nltk.corpus import wordnet
+    from nltk_resources import configure, missing_resources, vendor
+
+    # Reuse the vendored copy, fetching it there if this is a fresh build
+    configure(nltk)
+    if missing_resources(nltk, ['wordnet']):
+        vendor(packages=['wordnet'])
+
+    for name in wordnet.all_lemma_names():
+        word = normalize_key(name)
+        synonyms = []
+        seen = {word}
+        for syn in wordnet.synsets(name):
+            for lemma in syn.lemmas():
+                syn_name = lemma.name().replace("_", " ")
+                if syn_name.lower() not in seen and len(syn_name) > 2:
+                    seen.add(syn_name.lower())
+                    synonyms.append(syn_name)
+            if len(synonyms) >= max_synonyms:
+                break
+        yield word, synonyms[:max_synonyms]
+
+
+def build_index(path=DEFAULT_INDEX_PATH, max_synonyms=MAX_SYNONYMS):
+    """Compile WordNet into an index file at ``path``."""
+    return write_index(iter_wordnet_synonyms(max_synonyms), path)
+
+
+class SynonymIndex:
+    """Read-only, memory-mapped view of a synonym index file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a synonym index (format {FORMAT_VERSION})")
+
+        self._count = count
+        self._key_offsets = HEADER.size
+        self._val_offsets = self._key_offsets + (count + 1) * OFFSET.size
+        self._key_blob = self._val_offsets + (count + 1) * OFFSET.size
+        self._val_blob = self._key_blob + self._offset(self._key_offsets, count)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, word):
+        return self._find(normalize_key(word).encode('utf-8')) >= 0
+
+    def _offset(self, table, i):
+        return OFFSET.unpack_from(self._mm, table + i * OFFSET.size)[0]
+
+    def _key(self, i):
+        start = self._key_blob + self._offset(self._key_offsets, i)
+        end = self._key_blob + self._offset(self._key_offsets, i + 1)
+        return self._mm[start:end]
+
+    def _find(self, raw_key):
+        """Binary search for a key; returns its position or -1."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < raw_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._key(lo) == raw_key:
+            return lo
+        return -1
+
+    def _values(self, i):
+        start = self._val_blob + self._offset(self._val_offsets, i)
+        end = self._val_blob + self._offset(self._val_offsets, i + 1)
+        if start == end:
+            return []
+        return self._mm[start:end].decode('utf-8').split(SEPARATOR)
+
+    def lookup(self, word, limit=MAX_SYNONYMS):
+        """
+        Return up to ``limit`` synonyms for a word.
+
+        The exact word is tried first, then its morphological base forms, so
+        inflected words behave like ``wordnet.synsets`` lookups.
+        """
+        key = normalize_key(word)
+        synonyms = []
+        seen = {key}
+        for form in base_forms(key):
+            i = self._find(form.encode('utf-8'))
+            if i < 0:
+                continue
+            for syn in self._values(i):
+                if syn.lower() not in seen:
+                    seen.add(syn.lower())
+                    synonyms.append(syn)
+            if len(synonyms) >= limit:
+                break
+        return synonyms[:limit]
+
+    def close(self):
+        self._mm.close()
+
+
+_default_index = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def get_default_index():
+    """Return the shared index at DEFAULT_INDEX_PATH, or None if it is not built."""
+    global _default_index, _default_loaded
+    if not _default_loaded:
+        with _default_lock:
+            if not _default_loaded:
+                try:
+                    _default_index = SynonymIndex(DEFAULT_INDEX_PATH)
+                except (OSError, ValueError):
+                    _default_index = None
+                _default_loaded = True
+    return _default_index
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Build or query the WordNet synonym index.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='Compile WordNet into an index file')
+    build.add_argument('--output', default=DEFAULT_INDEX_PATH, help='Index file to write')
+    build.add_argument('--max-synonyms', type=int, default=MAX_SYNONYMS,
+                       help='Synonyms stored per word')
+
+    query = sub.add_parser('lookup', help='Look up words in an index file')
+    query.add_argument('words', nargs='+')
+    query.add_argument('--index', default=DEFAULT_INDEX_PATH, help='Index file to read')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        count = build_index(args.output, args.max_synonyms)
+        size = os.path.getsize(args.output)
+        print(f"Wrote {count} entries to {args.output} ({size / 1024:.0f} KB)")
+    else:
+        index = SynonymIndex(args.index)
+        for word in args.words:
+            print(f"{word}: {', '.join(index.lookup(word))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
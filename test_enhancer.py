@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Test script to verify the prompt enhancer works correctly."""
 
-from prompt_enhancer import enhance_prompt
+from prompt_enhancer import enhance_prompt, enhance_prompts, enhance_all_styles, enhance_incremental, PromptEnhancer
 
 print("="*60)
 print("PROMPT ENHANCER - FUNCTIONAL TEST")
@@ -53,6 +53,293 @@ print(f"  Enhanced length: {result['enhanced_length']} words")
 print(f"  Style used: {result['style']}")
 print(f"  ✓ PASSED")
 
+# Test 7: Batch API
+print("\n[Test 7] Batch Enhancement")
+batch = ['Make a website', {'prompt': 'Build a mobile app', 'style': 'creative'}, ('Create a database', 'detailed', True)]
+results = list(enhance_prompts(batch))
+expected = [
+    enhance_prompt('Make a website'),
+    enhance_prompt('Build a mobile app', style='creative'),
+    enhance_prompt('Create a database', style='detailed', context_boost=True),
+]
+print(f"  Batch size: {len(results)} prompts")
+print(f"  ✓ PASSED" if results == expected else "  ✗ FAILED")
+
+# Test 8: Result cache
+print("\n[Test 8] Result Cache")
+cached_enhancer = PromptEnhancer(cache_size=2)
+first = cached_enhancer.enhance_prompt('Build a mobile app', style='creative')
+first['keywords'].append('mutated')
+second = cached_enhancer.enhance_prompt('  Build a mobile app  ', style='creative')
+for text in ['Make a website', 'Create a database']:
+    cached_enhancer.enhance_prompt(text)
+stats = cached_enhancer.cache_stats()['results']
+print(f"  Hits: {stats['hits']}, Misses: {stats['misses']}, Evictions: {stats['evictions']}")
+cache_ok = 'mutated' not in second['keywords'] and stats['evictions'] == 1
+print(f"  ✓ PASSED" if cache_ok else "  ✗ FAILED")
+
+# Test 9: All styles in one call
+print("\n[Test 9] Enhance All Styles")
+fresh = PromptEnhancer(cache_size=0)
+all_styles = fresh.enhance_all_styles('Make a website that looks cool', context_boost=True)
+styles_ok = all(
+    r == fresh.enhance_prompt('Make a website that looks cool', style, True)
+    for style, r in all_styles.items()
+)
+print(f"  Styles: {', '.join(all_styles)}")
+print(f"  ✓ PASSED" if styles_ok and len(enhance_all_styles('Build an app')) == 4 else "  ✗ FAILED")
+from enhancer_metrics import MetricsRegistry
+registry = MetricsRegistry()
+PromptEnhancer(cache_size=0, metrics=registry).enhance_all_styles('Build an app. Make it fast.')
+counts = [line for line in registry.to_prometheus().splitlines() if '_count' in line]
+shared_once = 'prompt_enhancer_stage_seconds_count{stage="keywords"} 1' in counts
+print(f"  ✓ PASSED (shared stages recorded once)" if shared_once else "  ✗ FAILED")
+
+# Test 10: Incremental re-enhancement
+print("\n[Test 10] Incremental Enhancement")
+draft = 'Make a website. It should load fast. Add a contact form.'
+enhance_incremental(draft)
+edited = enhance_incremental(draft.replace('fast', 'instantly'), timings=True)
+print(f"  Recomputed: {edited['sentences']['recomputed']} of {edited['sentences']['total']} sentences")
+print(f"  Output: {edited['enhanced_prompt'][:80]}...")
+print(f"  ✓ PASSED" if edited['sentences']['recomputed'] == 1 else "  ✗ FAILED")
+
+# Test 11: Lazy results
+print("\n[Test 11] Lazy Result")
+full = fresh.enhance_prompt('Make a website that looks cool')
+lazy = fresh.enhance_prompt('Make a website that looks cool', lazy=True)
+skipped = fresh.enhance_prompt('Make a website that looks cool', keywords=False)
+print(f"  Keywords on access: {lazy['keywords']}")
+lazy_ok = lazy == full and skipped['keywords'] == [] and skipped['enhanced_prompt'] == full['enhanced_prompt']
+print(f"  ✓ PASSED" if lazy_ok else "  ✗ FAILED")
+
+# Test 12: Stage pipeline
+print("\n[Test 12] Stage Pipeline")
+from enhancer_pipeline import Pipeline
+pipeline = Pipeline(enhancer=fresh, concurrent=True)
+pipeline_ok = all(
+    pipeline.run(text, style, boost) == fresh.enhance_prompt(text, style, boost)
+    for text in ['Make a website that looks cool', 'Build an app. It should be fast.']
+    for style in ['professional', 'creative', 'detailed', 'simplified']
+    for boost in (False, True)
+)
+partial = Pipeline(['expand', 'style'], enhancer=fresh).run('Build an app')
+print(f"  Waves: {[[stage.name for stage in wave] for wave in pipeline.waves]}")
+print(f"  Subset output: {partial['enhanced_prompt'][:60]}...")
+print(f"  ✓ PASSED" if pipeline_ok and partial['keywords'] == [] else "  ✗ FAILED")
+pipeline.close()
+
+# Test 13: Statistical keyword backend
+print("\n[Test 13] Statistical Keywords")
+statistical = PromptEnhancer(cache_size=0, keyword_backend='statistical')
+phrases = statistical.extract_keywords('Make a website that looks cool for data science students.')
+print(f"  Keywords: {phrases}")
+print(f"  ✓ PASSED" if 'data science students' in phrases and 'make' not in phrases else "  ✗ FAILED")
+
+# Test 14: Background batch job
+print("\n[Test 14] Background Batch Job")
+from enhancer_batch import BatchJob
+job = BatchJob([{'prompt': 'Build an app'}, {'prompt': 'Write better code', 'style': 'creative'}],
+               workers=1).start()
+job.wait()
+progress = job.progress()
+print(f"  Progress: {progress['done']}/{progress['total']} at {progress['rate']:.1f} prompts/s")
+print(f"  ✓ PASSED" if progress['done'] == 2 and job.dump('csv').startswith('prompt,enhanced_prompt') else "  ✗ FAILED")
+
+# Test 15: Load generator
+print("\n[Test 15] Load Generator")
+from enhancer_loadgen import InProcessTarget, run_load
+traffic = [(None, 'Build an app', 'creative', False), (None, 'Write better code', 'detailed', True)] * 10
+report = run_load(InProcessTarget(), traffic, concurrency=2, interval=0.1)
+print(f"  {report['completed']} requests, p99 {report['latency']['p99_s'] * 1000:.2f} ms")
+print(f"  ✓ PASSED" if report['completed'] == 20 and report['errors'] == 0 else "  ✗ FAILED")
+
+# Test 16: Request profiling
+print("\n[Test 16] Request Profiling")
+import os
+import tempfile
+from enhancer_profiling import RequestProfiler
+profiler = RequestProfiler(tempfile.mkdtemp(), sample_every=2)
+profiled = PromptEnhancer(cache_size=0, profiler=profiler)
+profiled.enhance_prompt('Build an app', profiling=True)
+for _ in range(4):
+    profiled.enhance_prompt('Write better code')
+print(f"  Reports written: {profiler.reports} (last: {os.path.basename(profiler.last_report)})")
+print(f"  ✓ PASSED" if profiler.reports == 3 and os.path.exists(profiler.last_report) else "  ✗ FAILED")
+unwritable = PromptEnhancer(cache_size=0, profiler=RequestProfiler('/proc/nonexistent/profiles', 1))
+unwritable_result = unwritable.enhance_prompt('Build an app')
+print(f"  ✓ PASSED (unwritable directory)" if unwritable_result['enhanced_prompt'] and unwritable.profiler.errors == 1 else "  ✗ FAILED")
+
+# Test 17: Streaming enhancement
+print("\n[Test 17] Streaming Enhancement")
+stream_text = 'Make a website that looks cool. It should load fast.'
+parts = list(fresh.enhance_stream(stream_text, 'detailed', context_boost=True))
+streamed = ''.join(part['enhanced_text'] for part in parts)
+expected = fresh.enhance_prompt(stream_text, 'detailed', True)
+print(f"  Chunks: {len(parts)}, output: {streamed[:60]}...")
+print(f"  ✓ PASSED" if len(parts) == 1 and streamed == expected['enhanced_prompt'] and parts[-1]['keywords'] == expected['keywords'] else "  ✗ FAILED")
+
+# Test 18: Coalesced async requests
+print("\n[Test 18] Async Coalescing")
+import asyncio
+coalescing = PromptEnhancer(cache_size=0)
+computed = []
+compute = coalescing.enhance_prompt
+coalescing.enhance_prompt = lambda *args, **kwargs: computed.append(args) or compute(*args, **kwargs)
+
+async def enhance_concurrently(count):
+    return await asyncio.gather(*[coalescing.enhance_prompt_async('Build an app', 'creative')
+                                  for _ in range(count)])
+
+async_results = asyncio.run(enhance_concurrently(8))
+print(f"  8 concurrent requests, {len(computed)} computation(s)")
+print(f"  ✓ PASSED" if len(computed) == 1 and all(r == async_results[0] for r in async_results) else "  ✗ FAILED")
+
+# Test 19: Persistent cache
+print("\n[Test 19] Persistent Cache")
+import time
+from enhancer_cache import PersistentCache
+cache_path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+writer = PromptEnhancer(cache_size=0, persistent_cache=cache_path)
+written = writer.enhance_prompt('Build an app', 'detailed')
+reader = PromptEnhancer(cache_size=0, persistent_cache=cache_path)
+read_back = reader.enhance_prompt('Build an app', 'detailed')
+print(f"  Second enhancer: {reader.persistent_cache.hits} hit(s), {reader.persistent_cache.misses} miss(es)")
+print(f"  ✓ PASSED" if read_back == written and reader.persistent_cache.hits > 0 else "  ✗ FAILED")
+expiring = PromptEnhancer(cache_size=0, persistent_cache=PersistentCache(cache_path, ttl=0.05))
+time.sleep(0.1)
+expired = expiring.enhance_prompt('Build an app', 'detailed')
+print(f"  ✓ PASSED (expired entry missed)" if expired == written and expiring.persistent_cache.hits == 0 and expiring.persistent_cache.misses > 0 else "  ✗ FAILED")
+
+# Test 20: Requests during a slow lazy load
+print("\n[Test 20] Lazy Load Fallback")
+import subprocess
+import sys
+slow_load = """
+import threading
+import time
+import prompt_enhancer
+loading = threading.Event()
+load_nltk = prompt_enhancer._load_nltk
+prompt_enhancer._load_nltk = lambda: loading.set() or time.sleep(3) or load_nltk()
+prompt_enhancer.enhance_prompt('Build an app')
+loading.wait()
+start = time.perf_counter()
+result = prompt_enhancer.enhance_prompt('Write better code')
+served = time.perf_counter() - start
+start = time.perf_counter()
+ready = prompt_enhancer.warmup(block=True, timeout=0.2)
+waited = time.perf_counter() - start
+print(served < 1.0 and bool(result['enhanced_prompt']) and not prompt_enhancer.is_ready(), ready, waited < 1.0)
+"""
+lazy_env = dict(os.environ, PROMPT_ENHANCER_LOAD_MODE='lazy')
+lazy_run = subprocess.run([sys.executable, '-c', slow_load], env=lazy_env, capture_output=True, text=True)
+print(f"  Served by fallback, ready, timeout honoured: {lazy_run.stdout.strip()}")
+print(f"  ✓ PASSED" if lazy_run.stdout.strip() == 'True False True' else "  ✗ FAILED")
+
+# Test 21: HTTP server
+print("\n[Test 21] HTTP Server")
+import http.client
+import json
+import socket
+import threading
+from enhancer_server import EnhancementServer
+server_loop = asyncio.new_event_loop()
+server = EnhancementServer(port=0, workers=2)
+server_loop.run_until_complete(server.start())
+threading.Thread(target=server_loop.run_forever, daemon=True).start()
+
+connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=10)
+def post(path, payload):
+    connection.request('POST', path, json.dumps(payload), {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+single = post('/enhance', {'prompt': 'Build an app', 'style': 'creative'})
+kept_alive = connection.sock
+batch = post('/enhance/batch', {'prompts': ['Build an app', {'prompt': 'Write better code'}]})
+invalid = post('/enhance/batch', {'prompts': [{'prompt': 5}]})
+staged = post('/enhance', {'prompt': 'Build an app', 'stages': ['keywords', 'synonyms', 'expand'],
+                           'keywords': False})
+kept_alive = kept_alive is connection.sock
+connection.close()
+with socket.create_connection(('127.0.0.1', server.port), timeout=10) as raw:
+    raw.sendall(b'POST /enhance HTTP/1.1\r\nContent-Length: -5\r\n\r\n')
+    malformed = raw.recv(1024).split(b'\r\n', 1)[0]
+asyncio.run_coroutine_threadsafe(server.close(), server_loop).result()
+server_loop.call_soon_threadsafe(server_loop.stop)
+
+server_ok = (kept_alive and single == (200, enhance_prompt('Build an app', 'creative'))
+             and batch[0] == 200 and len(batch[1]['results']) == 2
+             and invalid[0] == 400 and staged[1]['keywords'] == [] and malformed == b'HTTP/1.1 400 Bad Request')
+print(f"  /enhance {single[0]}, /enhance/batch {batch[0]}, invalid item {invalid[0]}, kept alive: {kept_alive}")
+print(f"  Negative Content-Length: {malformed.decode()}")
+print(f"  ✓ PASSED" if server_ok else "  ✗ FAILED")
+
+# Test 22: Batch CLI across worker processes
+print("\n[Test 22] Batch CLI")
+batch_dir = tempfile.mkdtemp()
+batch_in, batch_out = os.path.join(batch_dir, 'in.jsonl'), os.path.join(batch_dir, 'out.jsonl')
+with open(batch_in, 'w', encoding='utf-8') as handle:
+    handle.write('{"prompt": "Build an app"}\n{"prompt": 5}\nnot json\n"Write better code"\n')
+cli = [sys.executable, 'enhancer_batch.py', batch_in, batch_out, '--workers', '2', '--chunk-size', '1']
+subprocess.run(cli, capture_output=True, check=True)
+with open(batch_out, encoding='utf-8') as handle:
+    written = [json.loads(line) for line in handle]
+print(f"  Records: {[record.get('error') or record['prompt'] for record in written]}")
+cli_ok = ([record.get('prompt') for record in written] == ['Build an app', 5, None, 'Write better code']
+          and written[0]['enhanced_prompt'] == enhance_prompt('Build an app')['enhanced_prompt']
+          and written[1]['error'].startswith('line 2:') and written[2]['error'].startswith('line 3:'))
+print(f"  ✓ PASSED" if cli_ok else "  ✗ FAILED")
+failed = subprocess.run(cli[:2] + [os.path.join(batch_dir, 'missing.jsonl')] + cli[3:], capture_output=True)
+with open(batch_out, encoding='utf-8') as handle:
+    kept = len(handle.readlines()) == 4
+later_fields = BatchJob([{'prompt': 'Build an app'}, {'prompt': 'Write docs', 'team': 'web'}], workers=1).start()
+later_fields.wait()
+csv_header = later_fields.dump('csv').splitlines()[0]
+print(f"  ✓ PASSED (failed run keeps output, CSV header: {csv_header[:30]}...)"
+      if failed.returncode and kept and 'team' in csv_header else "  ✗ FAILED")
+
+# Test 23: Rule matcher priority
+print("\n[Test 23] Rule Matcher Priority")
+from prompt_enhancer import RuleMatcher
+rules = [('app', 'first'), ('application', 'second'), ('web app', 'third'), ('web', 'fourth')]
+matcher = RuleMatcher(rules, 'none')
+
+def match_sequentially(rules, text, default):
+    for key, value in rules:
+        if key in text:
+            return value
+    return default
+
+rule_texts = ['a web application', 'a web page', 'an application', 'the web app', 'nothing here',
+              'webapp', 'make a website that looks cool']
+matched = [matcher.match(text) for text in rule_texts]
+print(f"  Matches: {matched}")
+rules_ok = matched == [match_sequentially(rules, text, 'none') for text in rule_texts]
+rules_ok = rules_ok and all(
+    fresh._elaboration_matcher.match(text) == match_sequentially(fresh.ELABORATIONS, text, fresh.DEFAULT_ELABORATION)
+    for text in rule_texts + ['build a mobile app with a database', 'write a data analysis report']
+)
+print(f"  ✓ PASSED" if rules_ok and matched[0] == 'first' else "  ✗ FAILED")
+
+# Test 24: Memory-mapped synonym index
+print("\n[Test 24] Synonym Index")
+from synonym_index import SynonymIndex, write_index
+index_path = os.path.join(tempfile.mkdtemp(), 'synonyms.idx')
+index_entries = [('website', ['site', 'web site']), ('build', ['construct', 'make']),
+                 ('Zebra', ['equine']), ('apple', ['pome']), ('data_set', ['dataset'])]
+written_keys = write_index(index_entries, index_path)
+index = SynonymIndex(index_path)
+lookups = {word: index.lookup(word) for word in ['apple', 'zebra', 'websites', 'building', 'data set', 'missing']}
+print(f"  {written_keys} keys, lookups: {lookups}")
+index_ok = (len(index) == 5 and lookups == {
+    'apple': ['pome'], 'zebra': ['equine'], 'websites': ['site', 'web site'],
+    'building': ['construct', 'make'], 'data set': ['dataset'], 'missing': [],
+} and 'website' in index and 'aardvark' not in index and 'zzz' not in index)
+index.close()
+print(f"  ✓ PASSED" if index_ok else "  ✗ FAILED")
+
 print("\n" + "="*60)
 print("✓✓✓ ALL TESTS PASSED - App is ready to run! ✓✓✓")
 print("="*60)